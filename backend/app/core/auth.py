@@ -1,4 +1,6 @@
 # backend/app/core/auth.py
+import hashlib
+import time
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
@@ -9,38 +11,52 @@ from app.models.user import User
 # HTTP Bearer token security
 security = HTTPBearer()
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user from JWT token"""
-    
-    # Extract token
-    token = credentials.credentials
-    
-    # Decode token
+# ── Verified-token cache ──────────────────────────────────────────
+# { sha256(token)[:32]: (valid_until, user_id) } — raw tokens are never stored.
+# Entries never outlive the token's own exp; the user row is still loaded per request.
+_token_cache: dict[str, tuple[float, int]] = {}
+TOKEN_CACHE_TTL_SECONDS = 30
+TOKEN_CACHE_MAX_ENTRIES = 10000
+
+def _user_id_from_token(token: str) -> int | None:
+    """User id from a valid token's `sub`, or None. Repeat tokens skip the JWT verify."""
+    key = hashlib.sha256(token.encode()).hexdigest()[:32]
+    now = time.time()
+    hit = _token_cache.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+
     payload = decode_access_token(token)
     if payload is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
-        )
-    
-    # Get user ID from token
-    user_id_raw = payload.get("sub")
-    if user_id_raw is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials"
-        )
+        return None
     try:
-        user_id = int(user_id_raw)
+        user_id = int(payload.get("sub"))
     except (ValueError, TypeError):
+        return None
+
+    valid_until = now + TOKEN_CACHE_TTL_SECONDS
+    if isinstance(payload.get("exp"), (int, float)):
+        valid_until = min(valid_until, payload["exp"])
+    if len(_token_cache) >= TOKEN_CACHE_MAX_ENTRIES:
+        _token_cache.clear()
+    _token_cache[key] = (valid_until, user_id)
+    return user_id
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: Session = Depends(get_db)
+) -> User:
+    """Get current authenticated user from JWT token.
+    A plain def, so FastAPI runs the user lookup in its threadpool instead of on the event loop."""
+
+    # Decode token (or reuse a recent verification of the same token)
+    user_id = _user_id_from_token(credentials.credentials)
+    if user_id is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials"
         )
-    
+
     # Get user from database
     user = db.query(User).filter(User.id == user_id).first()
     if user is None or not user.is_active:
@@ -48,5 +64,5 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive"
         )
-    
-    return user
\ No newline at end of file
+
+    return user
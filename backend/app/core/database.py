@@ -1,14 +1,23 @@
 # backend/app/core/database.py
+from datetime import datetime, timezone
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 from app.config import settings
 
-# Create database engine
+# Pool sizing only applies to server databases (SQLite is used for local runs)
+_pool_options = {} if settings.DATABASE_URL.startswith("sqlite") else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+}
+
+# Create database engine — one per process, shared by every request
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    echo=settings.DEBUG
+    echo=settings.DEBUG,
+    **_pool_options,
 )
 
 # Create session factory
@@ -24,4 +33,15 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def session_cache(db: Session) -> dict:
+    """Scratch cache stored on the session, so it lives exactly as long as the request."""
+    return db.info.setdefault("_request_cache", {})
+
+def utc_today_start(db: Session) -> datetime:
+    """Today's UTC midnight, computed once per request session."""
+    cache = session_cache(db)
+    if "utc_today_start" not in cache:
+        cache["utc_today_start"] = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    return cache["utc_today_start"]
@@ -0,0 +1,21 @@
+# backend/app/core/etag.py
+"""
+Conditional GET helpers: tag a JSON body with an ETag and answer 304 when
+the client's If-None-Match already names it.
+"""
+import hashlib
+
+from fastapi.responses import Response
+
+
+def etag_for(body: bytes) -> str:
+    """Strong ETag for a response body."""
+    return f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+
+def etag_response(body: bytes, if_none_match: str | None, cache_control: str = "private, no-cache") -> Response:
+    """Return the JSON body, or an empty 304 if the client already has this version."""
+    headers = {"ETag": etag_for(body), "Cache-Control": cache_control}
+    if if_none_match and headers["ETag"] in if_none_match:
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
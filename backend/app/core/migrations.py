@@ -0,0 +1,180 @@
+# backend/app/core/migrations.py
+"""
+Startup schema migrations, gated by a one-row `schema_version` table.
+
+Workers that find the stored version current return after a single SELECT.
+When it is stale, one worker takes a PostgreSQL advisory lock and runs the
+DDL; the others block on the lock for as long as that takes, then find the
+version current. If the migrating worker dies, its lock is released and the
+next waiter retries the migration.
+"""
+import logging
+import re
+
+from sqlalchemy import MetaData, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a step is added below (tagged with the new version) or a table/model is added
+SCHEMA_VERSION = 11
+
+# Arbitrary app-wide key for pg_advisory_lock
+_LOCK_KEY = 0x41636342  # "AccB"
+
+# Each step is (version that introduced it, statement). Only steps newer than the
+# stored version run, so a bump never repeats earlier table rewrites or FK checks.
+
+# Run together in one transaction — every statement must be idempotent
+_STEPS: list[tuple[int, str]] = [
+    (1, "ALTER TABLE user_ai_settings ADD COLUMN IF NOT EXISTS vision_enabled BOOLEAN DEFAULT false"),
+    # auth audit fields — one ALTER so the table is locked once
+    (1, "ALTER TABLE users"
+        " ADD COLUMN IF NOT EXISTS last_login_at TIMESTAMPTZ,"
+        " ADD COLUMN IF NOT EXISTS last_logout_at TIMESTAMPTZ,"
+        " ADD COLUMN IF NOT EXISTS last_login_ip VARCHAR(64),"
+        " ADD COLUMN IF NOT EXISTS last_logout_ip VARCHAR(64)"),
+    # JSONB so fields like metric_value->>'mood' are extracted server-side
+    (2, "ALTER TABLE user_analytics ALTER COLUMN metric_value TYPE JSONB USING metric_value::jsonb"),
+    # deleting a user (or conversation) removes its rows in the database
+    *(
+        (4, f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_{column}_fkey,"
+            f" ADD CONSTRAINT {table}_{column}_fkey FOREIGN KEY ({column})"
+            f" REFERENCES {target} (id) ON DELETE CASCADE")
+        for table, column, target in (
+            ("conversations", "user_id", "users"),
+            ("messages", "conversation_id", "conversations"),
+            ("user_plugins", "user_id", "users"),
+            ("user_analytics", "user_id", "users"),
+        )
+    ),
+    # the shared AI settings row outlives the user who configured it (small table)
+    (11, "ALTER TABLE user_ai_settings ALTER COLUMN user_id DROP NOT NULL,"
+         " DROP CONSTRAINT IF EXISTS user_ai_settings_user_id_fkey,"
+         " ADD CONSTRAINT user_ai_settings_user_id_fkey FOREIGN KEY (user_id)"
+         " REFERENCES users (id) ON DELETE SET NULL"),
+    # attached images get their own column instead of a JSON envelope in content
+    (6, "ALTER TABLE messages ADD COLUMN IF NOT EXISTS image_url TEXT"),
+    # one user_plugins row per (user, plugin). Racing first writes could
+    # insert twice; keep the oldest row, which is the one .first() was reading.
+    # The table is small (users x plugins), so a plain in-transaction build is fine.
+    (8, "DELETE FROM user_plugins a USING user_plugins b"
+        " WHERE a.user_id = b.user_id AND a.plugin_name = b.plugin_name AND a.id > b.id"),
+    (8, "CREATE UNIQUE INDEX IF NOT EXISTS ix_user_plugins_user_plugin ON user_plugins (user_id, plugin_name)"),
+]
+
+# CONCURRENTLY avoids locking live tables but cannot run inside a transaction
+_CONCURRENT_STEPS: list[tuple[int, str]] = [
+    # composite indexes matching the chat queries' filter + sort (the conversation
+    # one is ix_conversations_user_updated_id, v10); they also cover the plain
+    # foreign-key lookups, so the v3 single-column ones go
+    (5, "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_conversation_created "
+        "ON messages (conversation_id, created_at)"),
+    (5, "DROP INDEX CONCURRENTLY IF EXISTS ix_conversations_user_id"),
+    (5, "DROP INDEX CONCURRENTLY IF EXISTS ix_messages_conversation_id"),
+    # id as the final key matches the history's (recorded_at, id) keyset order,
+    # so pages come straight off the index; replaces the v1 ix_user_analytics_user_metric_time
+    (9, "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_user_analytics_user_metric_time_id "
+        "ON user_analytics (user_id, metric_type, recorded_at DESC, id DESC)"),
+    (9, "DROP INDEX CONCURRENTLY IF EXISTS ix_user_analytics_user_metric_time"),
+    # same for the conversation list's (updated_at, id) keyset; replaces the v5
+    # ix_conversations_user_updated
+    (10, "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversations_user_updated_id "
+         "ON conversations (user_id, updated_at DESC, id DESC)"),
+    (10, "DROP INDEX CONCURRENTLY IF EXISTS ix_conversations_user_updated"),
+]
+
+# v7: lets /chat/search's ILIKE '%term%' use an index instead of scanning every message.
+# Migration-only (not on the model): create_all runs before pg_trgm exists. Creating the
+# extension needs a privileged role, so it runs on its own and a failure only skips this index.
+_TRGM_VERSION = 7
+_TRGM_INDEX = (
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_content_trgm "
+    "ON messages USING gin (content gin_trgm_ops)"
+)
+
+
+def _stored_version(conn: Connection) -> int:
+    try:
+        return conn.execute(text("SELECT version FROM schema_version")).scalar() or 0
+    except DBAPIError:
+        return 0  # table not created yet
+
+
+_INDEX_NAME = re.compile(r"CREATE (?:UNIQUE )?INDEX CONCURRENTLY IF NOT EXISTS (\w+)")
+
+
+def _invalid_indexes(conn: Connection, names: list[str]) -> list[str]:
+    """Names left INVALID by a failed CONCURRENTLY build (IF NOT EXISTS would skip them)."""
+    return conn.execute(
+        text(
+            "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+            " WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+            " AND c.relnamespace = current_schema()::regnamespace"
+        ),
+        {"names": names},
+    ).scalars().all()
+
+
+def _create_trgm_index(conn: Connection) -> None:
+    try:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError:
+        # Search still works, just unindexed; a DBA can create both later
+        logger.warning("Could not create pg_trgm; skipping ix_messages_content_trgm", exc_info=True)
+        return
+    conn.execute(text(_TRGM_INDEX))
+
+
+def _apply(engine: Engine, conn: Connection, metadata: MetaData | None, current: int) -> None:
+    if metadata is not None:
+        metadata.create_all(bind=engine)
+    with engine.begin() as tx:
+        for version, stmt in _STEPS:
+            if version > current:
+                tx.execute(text(stmt))
+    concurrent = [stmt for version, stmt in _CONCURRENT_STEPS if version > current]
+    if current < _TRGM_VERSION:
+        concurrent.append(_TRGM_INDEX)
+    index_names = [m.group(1) for m in map(_INDEX_NAME.match, concurrent) if m]
+    # Leftovers of an earlier failed run would otherwise be kept as they are
+    for name in _invalid_indexes(conn, index_names):
+        logger.warning("Dropping invalid index %s left by an interrupted build", name)
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+    for stmt in concurrent:
+        if stmt is _TRGM_INDEX:
+            _create_trgm_index(conn)
+        else:
+            conn.execute(text(stmt))
+
+    invalid = _invalid_indexes(conn, index_names)
+    if invalid:
+        raise RuntimeError(f"Indexes left invalid after migration: {', '.join(invalid)}")
+    with engine.begin() as tx:
+        tx.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+        tx.execute(text("DELETE FROM schema_version"))
+        tx.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": SCHEMA_VERSION})
+
+
+def run_migrations(engine: Engine, metadata: MetaData | None = None) -> None:
+    """Bring the schema up to SCHEMA_VERSION; a no-op SELECT when already current.
+
+    If `metadata` is given, missing tables are created first (only on the stale path).
+    """
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        if _stored_version(conn) >= SCHEMA_VERSION:
+            return
+
+        # Blocks while another worker migrates — index builds on large tables can
+        # take minutes, so there is deliberately no timeout here
+        conn.execute(text("SELECT pg_advisory_lock(:k)"), {"k": _LOCK_KEY})
+        try:
+            # Usually the previous lock holder has already done the work
+            current = _stored_version(conn)
+            if current < SCHEMA_VERSION:
+                _apply(engine, conn, metadata, current)
+                logger.info("Schema migrated from version %s to %s", current, SCHEMA_VERSION)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _LOCK_KEY})
@@ -0,0 +1,56 @@
+# backend/app/core/pagination.py
+"""
+Keyset pagination over (timestamp, id), newest first.
+
+Cursors are opaque URL-safe tokens (base64 of epoch microseconds and id), so
+clients can pass the X-Next-Cursor header back as a query parameter unencoded.
+"""
+import base64
+from datetime import datetime, timedelta, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, literal, tuple_
+from sqlalchemy.orm import Session
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(at: datetime, row_id: int) -> str:
+    """Cursor pointing just past the row with this timestamp and id."""
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)   # SQLite returns naive UTC
+    raw = f"{(at - _EPOCH) // _MICROSECOND}.{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of encode_cursor; a malformed cursor is a 400."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        micros, row_id = raw.split(".")
+        return _EPOCH + int(micros) * _MICROSECOND, int(row_id)
+    except (ValueError, OverflowError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _sort_time(db: Session, column):
+    # SQLite compares timestamps as text, and server defaults are stored without
+    # fractional seconds while bound values carry six digits — normalise both.
+    if db.get_bind().dialect.name == "sqlite":
+        return func.strftime("%Y-%m-%d %H:%M:%f", column)
+    return column
+
+
+def keyset_order(db: Session, at_column, id_column) -> tuple:
+    """ORDER BY clauses for newest-first keyset pages."""
+    return _sort_time(db, at_column).desc(), id_column.desc()
+
+
+def keyset_before(db: Session, at_column, id_column, cursor: str):
+    """WHERE clause selecting the rows after `cursor` in keyset_order."""
+    at, row_id = decode_cursor(cursor)
+    before = tuple_(_sort_time(db, literal(at, at_column.type)), literal(row_id, id_column.type))
+    return tuple_(_sort_time(db, at_column), id_column) < before
@@ -1,20 +1,44 @@
 # backend/app/core/security.py
 from datetime import datetime, timedelta
 from typing import Optional
+import anyio
+import anyio.to_thread
+import bcrypt
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from app.config import settings
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt only uses the first 72 bytes; cut explicitly, as passlib did, so
+# hashes created before the switch keep verifying
+_BCRYPT_MAX_BYTES = 72
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return bcrypt.checkpw(plain_password.encode()[:_BCRYPT_MAX_BYTES], hashed_password.encode())
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
+    return bcrypt.hashpw(password.encode()[:_BCRYPT_MAX_BYTES], salt).decode()
+
+# bcrypt is deliberately slow (~100-300 ms); run it off the event loop, with
+# at most this many hashes in flight so a login flood can't take every worker thread
+HASH_CONCURRENCY = 4
+_hash_limiter: anyio.CapacityLimiter | None = None
+
+def _limiter() -> anyio.CapacityLimiter:
+    # Created lazily: the limiter must be built inside a running event loop
+    global _hash_limiter
+    if _hash_limiter is None:
+        _hash_limiter = anyio.CapacityLimiter(HASH_CONCURRENCY)
+    return _hash_limiter
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in a worker thread"""
+    return await anyio.to_thread.run_sync(verify_password, plain_password, hashed_password, limiter=_limiter())
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in a worker thread"""
+    return await anyio.to_thread.run_sync(get_password_hash, password, limiter=_limiter())
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
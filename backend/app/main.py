@@ -1,8 +1,13 @@
 # backend/app/main.py
+import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.core.database import engine, Base
+from app.core.pagination import NEXT_CURSOR_HEADER
+
+logger = logging.getLogger(__name__)
 
 # Import routers
 from app.routers import auth, chat, admin
@@ -15,59 +20,36 @@ from app.routers import suggestions
 from app.models import user, conversation, settings as settings_model  # noqa: F401
 from app.models import plugin as plugin_model                            # noqa: F401
 
-# Register plugins with the plugin manager
+# Register every plugin found under app/plugins (registration order is display order)
+from app.plugins import discover_plugins
 from app.plugins.manager import plugin_manager
-from app.plugins.daily_checkin.plugin import daily_checkin_plugin
-from app.plugins.mood_tracker.plugin import mood_tracker_plugin
-from app.plugins.recharge.plugin import recharge_plugin
-from app.plugins.crisis_support.plugin import crisis_support_plugin
-from app.plugins.kanban_board.plugin import kanban_board_plugin
-from app.plugins.task_breakdown.plugin import task_breakdown_plugin
-
-plugin_manager.register(daily_checkin_plugin)
-plugin_manager.register(mood_tracker_plugin)
-plugin_manager.register(recharge_plugin)
-plugin_manager.register(crisis_support_plugin)
-plugin_manager.register(kanban_board_plugin)
-plugin_manager.register(task_breakdown_plugin)
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+for _plugin in discover_plugins():
+    plugin_manager.register(_plugin)
 
-# Safe column migrations (add new columns to existing tables without breaking anything)
-def _run_migrations():
-    from sqlalchemy import text
-    with engine.connect() as conn:
-        # vision_enabled added in v2
-        conn.execute(text(
-            "ALTER TABLE user_ai_settings ADD COLUMN IF NOT EXISTS vision_enabled BOOLEAN DEFAULT false"
-        ))
-        # auth audit fields
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login_at TIMESTAMPTZ"
-        ))
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_logout_at TIMESTAMPTZ"
-        ))
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login_ip VARCHAR(64)"
-        ))
-        conn.execute(text(
-            "ALTER TABLE users ADD COLUMN IF NOT EXISTS last_logout_ip VARCHAR(64)"
-        ))
-        conn.commit()
+# Create tables and apply column migrations. On an up-to-date database this is a
+# single SELECT against schema_version — no create_all / DDL on every worker boot.
+from app.core.migrations import run_migrations
 
-try:
-    _run_migrations()
-except Exception:
-    pass  # Table may not exist yet (first run) — create_all above will handle it
+_metadata = Base.metadata if settings.AUTO_CREATE_TABLES else None
+if engine.dialect.name == "postgresql":
+    try:
+        run_migrations(engine, _metadata)
+    except Exception:
+        # The app depends on these columns/constraints — never boot on a stale schema
+        logger.exception("Schema migration failed")
+        raise
+elif _metadata is not None:
+    # SQLite in development — no migrations, plain create_all
+    _metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="AccessBot API",
     description="AI companion for people with disabilities",
     version="0.1.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -77,6 +59,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],   # keyset pagination for the conversation and check-in lists
 )
 
 # Health check endpoints
@@ -92,11 +75,20 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
-# Include routers
-app.include_router(auth.router, prefix="/auth", tags=["Authentication"])
-app.include_router(chat.router, prefix="/chat", tags=["Chat"])
-app.include_router(admin.router, prefix="/admin", tags=["Admin"])
-app.include_router(plugins.router, prefix="/plugins", tags=["Plugins"])
-app.include_router(voice.router, prefix="/voice", tags=["Voice"])
-app.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
-app.include_router(suggestions.router, prefix="/chat/suggestions", tags=["Suggestions"])
\ No newline at end of file
+# Attach routers
+# Each router declares its own prefix, tags and response class.
+# Starlette matches routes in order, so the busiest routers go first
+# (the health checks above are already ahead of them).
+ROUTERS = (
+    chat.router,
+    plugins.router,
+    suggestions.router,
+    auth.router,
+    analytics.router,
+    voice.router,
+    admin.router,
+)
+
+# include_router (rather than copying r.routes) so app.dependency_overrides applies
+for r in ROUTERS:
+    app.include_router(r)
@@ -1,5 +1,7 @@
 # backend/app/models/conversation.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+import json
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -7,10 +9,18 @@ class Conversation(Base):
     __tablename__ = "conversations"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     title = Column(String(255), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Lazy by default — eager-load with selectinload() where the messages are needed
+    messages = relationship(
+        "Message",
+        back_populates="conversation",
+        order_by="Message.created_at",
+        passive_deletes=True,
+    )
     
     def __repr__(self):
         return f"<Conversation(id={self.id}, user_id={self.user_id})>"
@@ -19,10 +29,36 @@ class Message(Base):
     __tablename__ = "messages"
     
     id = Column(Integer, primary_key=True, index=True)
-    conversation_id = Column(Integer, ForeignKey("conversations.id"), nullable=False)
+    conversation_id = Column(Integer, ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False)
     role = Column(String(20), nullable=False)  # 'user' or 'assistant'
     content = Column(Text, nullable=False)
+    image_url = Column(Text, nullable=True)  # attached image (data URL), user messages only
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    conversation = relationship("Conversation", back_populates="messages")
     
     def __repr__(self):
-        return f"<Message(id={self.id}, role={self.role})>"
\ No newline at end of file
+        return f"<Message(id={self.id}, role={self.role})>"
+
+
+def wire_content(content: str, image_url: str | None) -> str:
+    """
+    Message content as the API has always returned it: a {"text", "image"}
+    JSON envelope when an image is attached (older rows store it that way).
+    """
+    if image_url is None:
+        return content
+    return json.dumps({"text": content, "image": image_url})
+
+
+# A user's conversation list is ordered by most recently updated, id breaking ties
+# (the keyset pagination order)
+Index(
+    "ix_conversations_user_updated_id",
+    Conversation.user_id,
+    Conversation.updated_at.desc(),
+    Conversation.id.desc(),
+)
+
+# A conversation's messages are read in created_at order
+Index("ix_messages_conversation_created", Message.conversation_id, Message.created_at)
@@ -1,5 +1,7 @@
 # backend/app/models/plugin.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.mutable import MutableDict
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -9,10 +11,11 @@ class UserPlugin(Base):
     __tablename__ = "user_plugins"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     plugin_name = Column(String(50), nullable=False)
     enabled = Column(Boolean, default=True)
-    settings = Column(JSON, nullable=True)  # plugin-specific config
+    # MutableDict: setting a key marks the row dirty, no flag_modified needed
+    settings = Column(MutableDict.as_mutable(JSON), nullable=True)  # plugin-specific config
 
     def __repr__(self):
         return f"<UserPlugin(user_id={self.user_id}, plugin={self.plugin_name}, enabled={self.enabled})>"
@@ -23,10 +26,30 @@ class UserAnalytics(Base):
     __tablename__ = "user_analytics"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     metric_type = Column(String(50), nullable=False)  # 'mood', 'energy', 'checkin'
-    metric_value = Column(JSON, nullable=False)        # flexible payload
+    metric_value = Column(MutableDict.as_mutable(JSON().with_variant(JSONB(), "postgresql")), nullable=False)  # flexible payload
     recorded_at = Column(DateTime(timezone=True), server_default=func.now())
 
     def __repr__(self):
         return f"<UserAnalytics(user_id={self.user_id}, type={self.metric_type})>"
+
+
+# Check-in / mood lookups filter on (user, metric) and a recorded_at range, newest first;
+# id breaks ties in the same order as the history's keyset pagination
+Index(
+    "ix_user_analytics_user_metric_time_id",
+    UserAnalytics.user_id,
+    UserAnalytics.metric_type,
+    UserAnalytics.recorded_at.desc(),
+    UserAnalytics.id.desc(),
+)
+
+
+# Every plugin lookup is by (user, plugin); unique so racing first writes can't duplicate a row
+Index(
+    "ix_user_plugins_user_plugin",
+    UserPlugin.user_id,
+    UserPlugin.plugin_name,
+    unique=True,
+)
@@ -7,7 +7,8 @@ class UserAISettings(Base):
     __tablename__ = "user_ai_settings"
     
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, unique=True)
+    # Shared app-wide row; deleting the user who configured it keeps it (owner becomes NULL)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True, unique=True)
     
     # Generic provider configuration
     provider_name = Column(String(100), nullable=False, default="claude")
@@ -0,0 +1,16 @@
+# backend/app/plugins/__init__.py
+import importlib
+from pathlib import Path
+
+from app.plugins.base_plugin import BasePlugin
+
+_PLUGINS_DIR = Path(__file__).parent
+
+
+def discover_plugins() -> list[BasePlugin]:
+    """Import every app/plugins/*/plugin.py and return the plugin instances they export, in display order."""
+    found = []
+    for path in _PLUGINS_DIR.glob("*/plugin.py"):
+        module = importlib.import_module(f"{__name__}.{path.parent.name}.plugin")
+        found.extend(obj for obj in vars(module).values() if isinstance(obj, BasePlugin))
+    return sorted(found, key=lambda plugin: (plugin.order, plugin.name))
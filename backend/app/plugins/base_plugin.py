@@ -9,6 +9,13 @@ class BasePlugin(ABC):
     Plugins are self-contained feature modules that can be enabled/disabled per user.
     """
 
+    # Set False on plugins whose get_context always returns None, so the
+    # manager skips them when building the AI system prompt.
+    provides_context: bool = True
+
+    # Position in the plugin list (lower first); ties fall back to the name.
+    order: int = 100
+
     @property
     @abstractmethod
     def name(self) -> str:
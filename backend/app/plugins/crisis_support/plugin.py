@@ -4,6 +4,8 @@ from app.plugins.base_plugin import BasePlugin
 
 class CrisisSupportPlugin(BasePlugin):
     name = "crisis_support"
+    order = 40
+    provides_context = False
     display_name = "Urgent Support Chat"
     description = "Separate urgent session chat focused on grounding, de-escalation, and step-by-step coping support."
 
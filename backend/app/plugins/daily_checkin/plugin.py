@@ -1,6 +1,8 @@
 # backend/app/plugins/daily_checkin/plugin.py
-from datetime import date, timezone, datetime
+from typing import Literal, get_args
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
+from app.core.database import session_cache, utc_today_start
 from app.plugins.base_plugin import BasePlugin
 from app.models.plugin import UserAnalytics
 
@@ -13,9 +15,17 @@ MOOD_LABELS = {
     "struggling": "😔 Struggling",
 }
 
+# Request models use this so invalid moods are rejected (422) before reaching the plugin
+Mood = Literal["great", "good", "okay", "tired", "struggling"]
+
+VALID_MOODS = frozenset(get_args(Mood))
+assert VALID_MOODS == MOOD_LABELS.keys(), "Mood and MOOD_LABELS must list the same moods"
+_VALID_MOODS_HINT = ", ".join(MOOD_LABELS)
+
 
 class DailyCheckinPlugin(BasePlugin):
     name = "daily_checkin"
+    order = 10
     display_name = "Daily Check-in"
     description = (
         "Asks how you're doing once a day and records your response. "
@@ -29,8 +39,9 @@ class DailyCheckinPlugin(BasePlugin):
         """
         entry = self._todays_checkin(user_id, db)
         if entry:
-            mood = entry.metric_value.get("mood", "")
-            note = entry.metric_value.get("note", "")
+            mv = entry.metric_value or {}
+            mood = mv.get("mood", "")
+            note = mv.get("note", "")
             label = MOOD_LABELS.get(mood, mood)
             ctx = f"[Daily Check-in] The user checked in today and said they feel: {label}."
             if note:
@@ -44,8 +55,8 @@ class DailyCheckinPlugin(BasePlugin):
         return self._todays_checkin(user_id, db) is not None
 
     def submit_checkin(self, user_id: int, mood: str, note: str | None, db: Session) -> dict:
-        if mood not in MOOD_LABELS:
-            raise ValueError(f"Invalid mood '{mood}'. Valid: {list(MOOD_LABELS)}")
+        if mood not in VALID_MOODS:
+            raise ValueError(f"Invalid mood '{mood}'. Valid: {_VALID_MOODS_HINT}")
 
         entry = UserAnalytics(
             user_id=user_id,
@@ -55,6 +66,7 @@ class DailyCheckinPlugin(BasePlugin):
         db.add(entry)
         db.commit()
         db.refresh(entry)
+        session_cache(db).pop(self._cache_key(user_id, db), None)
 
         return {
             "mood": mood,
@@ -63,17 +75,28 @@ class DailyCheckinPlugin(BasePlugin):
             "recorded_at": entry.recorded_at.isoformat()
         }
 
-    def _todays_checkin(self, user_id: int, db: Session) -> UserAnalytics | None:
-        today_start = datetime.combine(date.today(), datetime.min.time()).replace(tzinfo=timezone.utc)
-        return (
-            db.query(UserAnalytics)
-            .filter(
-                UserAnalytics.user_id == user_id,
-                UserAnalytics.metric_type == "checkin",
-                UserAnalytics.recorded_at >= today_start,
-            )
-            .first()
-        )
+    @staticmethod
+    def _cache_key(user_id: int, db: Session) -> tuple:
+        return ("checkin", user_id, utc_today_start(db))
+
+    def _todays_checkin(self, user_id: int, db: Session) -> Row | None:
+        """Today's check-in as an (id, metric_value) row — callers never need the full entity."""
+        # Context collection and the router may both ask within one request —
+        # cache the row on the session so the query runs once.
+        cache = session_cache(db)
+        key = self._cache_key(user_id, db)
+        if key not in cache:
+            today_start = key[2]
+            cache[key] = db.execute(
+                select(UserAnalytics.id, UserAnalytics.metric_value)
+                .where(
+                    UserAnalytics.user_id == user_id,
+                    UserAnalytics.metric_type == "checkin",
+                    UserAnalytics.recorded_at >= today_start,
+                )
+                .limit(1)
+            ).first()
+        return cache[key]
 
 
 # Module-level instance
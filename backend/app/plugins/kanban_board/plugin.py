@@ -4,6 +4,8 @@ from app.plugins.base_plugin import BasePlugin
 
 class KanbanBoardPlugin(BasePlugin):
     name = "kanban_board"
+    order = 50
+    provides_context = False
     display_name = "Task Board"
     description = "Track personal tasks with Backlog, Pending, In Progress, and Completed stages."
 
@@ -1,9 +1,20 @@
 # backend/app/plugins/manager.py
+import asyncio
+import logging
 from typing import Dict, List
+from sqlalchemy import select
 from sqlalchemy.orm import Session
+from app.core.database import session_cache
 from app.plugins.base_plugin import BasePlugin
 from app.models.plugin import UserPlugin
 
+logger = logging.getLogger(__name__)
+
+# Upper bound per plugin on *awaited* I/O (e.g. an HTTP fetch), so one slow plugin
+# can't stall every chat turn. Synchronous work inside get_context — the bundled
+# plugins' SQLAlchemy queries — blocks the event loop and is not cut short.
+CONTEXT_TIMEOUT_SECONDS = 1.0
+
 
 class PluginManager:
     """
@@ -13,10 +24,13 @@ class PluginManager:
 
     def __init__(self):
         self._registry: Dict[str, BasePlugin] = {}
+        # Plugins whose get_context can return something; built on first use
+        self._context_plugins: List[BasePlugin] | None = None
 
     def register(self, plugin: BasePlugin):
         """Register a plugin with the manager."""
         self._registry[plugin.name] = plugin
+        self._context_plugins = None
 
     def all_plugins(self) -> List[BasePlugin]:
         return list(self._registry.values())
@@ -24,23 +38,42 @@ class PluginManager:
     def get(self, name: str) -> BasePlugin | None:
         return self._registry.get(name)
 
+    def context_plugins(self) -> List[BasePlugin]:
+        """Plugins that provide AI context; no-op plugins are partitioned out once."""
+        if self._context_plugins is None:
+            self._context_plugins = [p for p in self.all_plugins() if p.provides_context]
+        return self._context_plugins
+
     # ── Per-user enable/disable ──────────────────────────────────────────────
 
     def is_enabled(self, plugin_name: str, user_id: int, db: Session) -> bool:
         """Return True if user has this plugin enabled (defaults to True if no row yet)."""
-        row = db.query(UserPlugin).filter(
-            UserPlugin.user_id == user_id,
-            UserPlugin.plugin_name == plugin_name
-        ).first()
-        return row.enabled if row else True   # enabled by default
-
-    def set_enabled(self, plugin_name: str, user_id: int, enabled: bool, db: Session):
-        """Enable or disable a plugin for a specific user."""
-        row = db.query(UserPlugin).filter(
-            UserPlugin.user_id == user_id,
-            UserPlugin.plugin_name == plugin_name
-        ).first()
+        return self.enabled_map(user_id, db).get(plugin_name, True)   # enabled by default
+
+    def enabled_map(self, user_id: int, db: Session) -> Dict[str, bool]:
+        """
+        Return {plugin_name: enabled} for every plugin row the user has, in one query.
+        Plugins missing from the map have no row yet and are enabled by default.
+        Cached on the session, so every check within a request shares the one query.
+        """
+        cache = session_cache(db)
+        key = ("plugins_enabled", user_id)
+        if key not in cache:
+            rows = db.execute(
+                select(UserPlugin.plugin_name, UserPlugin.enabled).where(UserPlugin.user_id == user_id)
+            ).all()
+            cache[key] = {name: enabled for name, enabled in rows}
+        return cache[key]
+
+    def set_enabled(self, plugin_name: str, user_id: int, enabled: bool | None, db: Session) -> bool:
+        """
+        Enable or disable a plugin for a specific user; `None` flips the current state.
+        The row is read once for both the current state and the update. Returns the new state.
+        """
+        row = db.query(UserPlugin).filter_by(user_id=user_id, plugin_name=plugin_name).one_or_none()
 
+        if enabled is None:
+            enabled = not row.enabled if row else False   # no row yet means enabled
         if row:
             row.enabled = enabled
         else:
@@ -48,6 +81,8 @@ class PluginManager:
             db.add(row)
 
         db.commit()
+        session_cache(db).pop(("plugins_enabled", user_id), None)
+        return enabled
 
     # ── AI context collection ────────────────────────────────────────────────
 
@@ -56,17 +91,35 @@ class PluginManager:
         Gather context strings from all enabled plugins and return a combined
         system-prompt addition. Returns empty string if nothing to add.
         """
-        parts = []
-        for plugin in self._registry.values():
-            if self.is_enabled(plugin.name, user_id, db):
-                try:
-                    ctx = await plugin.get_context(user_id, db)
-                    if ctx:
-                        parts.append(ctx)
-                except Exception:
-                    pass   # never let a plugin break the chat
-
-        return "\n\n".join(parts)
+        plugins = self.context_plugins()
+        if not plugins:
+            return ""
+        enabled = self.enabled_map(user_id, db)
+        # Plugins run concurrently so slow I/O-bound ones overlap. Sharing `db` is
+        # safe: DB-bound plugins query synchronously, so each query completes
+        # before control returns to the event loop.
+        results = await asyncio.gather(*(
+            self._safe_get_context(plugin, user_id, db)
+            for plugin in plugins
+            if enabled.get(plugin.name, True)
+        ))
+        return "\n\n".join(ctx for ctx in results if ctx)
+
+    @staticmethod
+    async def _safe_get_context(plugin: BasePlugin, user_id: int, db: Session) -> str | None:
+        """
+        Run one plugin's get_context, logging and swallowing failures.
+        The timeout only fires while the coroutine is awaiting; sync DB calls stay
+        on the loop because the request's Session can't be shared across threads.
+        """
+        # Never let a plugin break the chat — but do log why it was skipped
+        try:
+            return await asyncio.wait_for(plugin.get_context(user_id, db), CONTEXT_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Plugin %s timed out building AI context", plugin.name)
+        except Exception:
+            logger.warning("Plugin %s failed building AI context", plugin.name, exc_info=True)
+        return None
 
 
 # Singleton used across the app
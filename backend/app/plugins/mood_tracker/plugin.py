@@ -1,6 +1,8 @@
 # backend/app/plugins/mood_tracker/plugin.py
-from datetime import date, timedelta, timezone, datetime
+from datetime import timedelta
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
+from app.core.database import utc_today_start
 from app.plugins.base_plugin import BasePlugin
 from app.models.plugin import UserAnalytics
 
@@ -16,6 +18,7 @@ MOOD_EMOJI = {
 
 class MoodTrackerPlugin(BasePlugin):
     name = "mood_tracker"
+    order = 20
     display_name = "Mood Tracker"
     description = (
         "Keeps a 30-day history of your daily moods. "
@@ -28,10 +31,11 @@ class MoodTrackerPlugin(BasePlugin):
         if not recent:
             return None
 
-        lines = []
-        for entry in recent[-5:]:     # most recent 5
-            emoji = MOOD_EMOJI.get(entry["mood"], "")
-            lines.append(f"  • {entry['date']}: {emoji} {entry['mood']}")
+        # get_history already resolved each entry's emoji
+        lines = [
+            f"  • {entry['date']}: {entry['emoji']} {entry['mood']}"
+            for entry in recent[-5:]      # most recent 5
+        ]
 
         return "[Mood History - last 7 days]\n" + "\n".join(lines)
 
@@ -39,42 +43,50 @@ class MoodTrackerPlugin(BasePlugin):
 
     def get_history(self, user_id: int, db: Session, days: int = 30) -> list[dict]:
         """Return a list of mood entries from the last `days` days."""
-        since = datetime.combine(
-            date.today() - timedelta(days=days),
-            datetime.min.time()
-        ).replace(tzinfo=timezone.utc)
-
-        rows = (
-            db.query(UserAnalytics)
-            .filter(
+        rows = db.execute(
+            select(
+                UserAnalytics.id,
+                UserAnalytics.metric_value["mood"].as_string(),
+                UserAnalytics.metric_value["note"].as_string(),
+                UserAnalytics.recorded_at,
+            )
+            .where(
                 UserAnalytics.user_id == user_id,
                 UserAnalytics.metric_type == "checkin",
-                UserAnalytics.recorded_at >= since,
+                UserAnalytics.recorded_at >= utc_today_start(db) - timedelta(days=days),
             )
             .order_by(UserAnalytics.recorded_at)
-            .all()
-        )
+        ).all()
 
-        return [
-            {
-                "id": row.id,
-                "mood": row.metric_value.get("mood", ""),
-                "note": row.metric_value.get("note", ""),
-                "emoji": MOOD_EMOJI.get(row.metric_value.get("mood", ""), ""),
-                "date": row.recorded_at.strftime("%Y-%m-%d"),
-                "recorded_at": row.recorded_at.isoformat(),
-            }
-            for row in rows
-        ]
+        history = []
+        for row_id, mood, note, recorded_at in rows:
+            mood = mood or ""
+            history.append({
+                "id": row_id,
+                "mood": mood,
+                "note": note or "",
+                "emoji": MOOD_EMOJI.get(mood, ""),
+                "date": recorded_at.date().isoformat(),
+                "recorded_at": recorded_at.isoformat(),
+            })
+        return history
 
     def mood_summary(self, user_id: int, db: Session) -> dict:
         """Count mood occurrences over the last 30 days."""
-        history = self.get_history(user_id, db, days=30)
+        mood = UserAnalytics.metric_value["mood"].as_string()
+        rows = db.execute(
+            select(mood, func.count())
+            .where(
+                UserAnalytics.user_id == user_id,
+                UserAnalytics.metric_type == "checkin",
+                UserAnalytics.recorded_at >= utc_today_start(db) - timedelta(days=30),
+            )
+            .group_by(mood)
+        ).all()
         counts: dict[str, int] = {}
-        for entry in history:
-            mood = entry["mood"]
-            counts[mood] = counts.get(mood, 0) + 1
-        return {"total": len(history), "counts": counts}
+        for m, n in rows:
+            counts[m or ""] = counts.get(m or "", 0) + n   # NULL and "" both mean no mood
+        return {"total": sum(counts.values()), "counts": counts}
 
 
 # Module-level instance
@@ -1,10 +1,143 @@
+import asyncio
+import time
+from types import MappingProxyType
 from typing import Any
 import httpx
 from app.plugins.base_plugin import BasePlugin
 
 
+_QUOTE_URL = "https://zenquotes.io/api/random"
+_QUOTE_FRESH_SECONDS = 600
+
+_FALLBACK_QUOTE = {
+    "text": "Small steps every day still move you forward.",
+    "author": "AccessBot",
+    "source": "local",
+}
+
+# Stale-while-revalidate cache: serve whatever we have, refresh in the background
+_quote_cache: dict = {"data": None, "fetched_at": 0.0}
+_quote_lock = asyncio.Lock()
+_refresh_task: asyncio.Task | None = None
+
+# One pooled client so repeat fetches reuse the TLS connection
+_client: httpx.AsyncClient | None = None
+
+
+def _http() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(8.0, connect=4.0))
+    return _client
+
+
+async def _fetch_quote() -> dict | None:
+    try:
+        response = await _http().get(_QUOTE_URL)
+        response.raise_for_status()
+        data = response.json()
+        if isinstance(data, list) and data:
+            q = data[0]
+            text = q.get("q") or ""
+            # zenquotes returns this string when rate-limited
+            if "too many requests" in text.lower() or not text:
+                return None
+            return {
+                "text": text,
+                "author": q.get("a") or "Unknown",
+                "source": "zenquotes",
+            }
+    except Exception:
+        pass
+    return None
+
+
+async def _refresh_quote() -> dict | None:
+    async with _quote_lock:
+        data = await _fetch_quote()
+        if data is not None:
+            _quote_cache.update(data=data, fetched_at=time.monotonic())
+        elif _quote_cache["data"] is None:
+            # Serve the local quote meanwhile; fetched_at stays 0 so it's retried in the background
+            _quote_cache["data"] = _FALLBACK_QUOTE
+        return data
+
+
+# Curated content never changes at runtime — build it once, read-only
+_ARTICLES = (
+    MappingProxyType({
+        "title": "How to Build Better Habits",
+        "source": "James Clear",
+        "url": "https://jamesclear.com/three-steps-habit-change",
+        "summary": "Practical habit framework for small, sustainable progress.",
+    }),
+    MappingProxyType({
+        "title": "Resilience Guide",
+        "source": "Mind UK",
+        "url": "https://www.mind.org.uk/information-support/tips-for-everyday-living/wellbeing/wellbeing/",
+        "summary": "Actionable tips for wellbeing, energy, and emotional resilience.",
+    }),
+    MappingProxyType({
+        "title": "Self-care for Stress",
+        "source": "CDC",
+        "url": "https://www.cdc.gov/howrightnow/taking-care/index.html",
+        "summary": "Evidence-based stress management and self-care recommendations.",
+    }),
+    MappingProxyType({
+        "title": "Tiny Joy Practices",
+        "source": "Greater Good Science Center",
+        "url": "https://greatergood.berkeley.edu/topic/happiness/definition",
+        "summary": "Science-backed ideas to add small moments of joy each day.",
+    }),
+)
+
+_VIDEOS = (
+    MappingProxyType({
+        "title": "How to Make Stress Your Friend",
+        "source": "TED",
+        "url": "https://www.ted.com/talks/kelly_mcgonigal_how_to_make_stress_your_friend",
+        "summary": "Reframing stress can improve confidence and outcomes.",
+    }),
+    MappingProxyType({
+        "title": "The Happy Secret to Better Work",
+        "source": "TED",
+        "url": "https://www.ted.com/talks/shawn_achor_the_happy_secret_to_better_work",
+        "summary": "Positive habits can unlock focus, creativity, and productivity.",
+    }),
+    MappingProxyType({
+        "title": "Guided Breathing for Calm",
+        "source": "YouTube",
+        "url": "https://www.youtube.com/watch?v=SEfs5TJZ6Nk",
+        "summary": "Short breathing video for grounding and mental reset.",
+    }),
+)
+
+_AUDIO = (
+    MappingProxyType({
+        "title": "Meditation Minis",
+        "source": "Podcast",
+        "url": "https://meditationminis.com/podcast/",
+        "summary": "Short guided meditations for stress, sleep, and recharge.",
+    }),
+    MappingProxyType({
+        "title": "The Happiness Lab",
+        "source": "Podcast",
+        "url": "https://www.pushkin.fm/podcasts/the-happiness-lab-with-dr-laurie-santos",
+        "summary": "Psychology-based episodes on happiness and healthy habits.",
+    }),
+    MappingProxyType({
+        "title": "Nature Soundscapes",
+        "source": "YouTube Music",
+        "url": "https://music.youtube.com/search?q=nature+sounds+relax",
+        "summary": "Ambient audio for focus, rest, and decompression.",
+    }),
+)
+
+
 class RechargePlugin(BasePlugin):
     name = "recharge"
+    order = 30
+    provides_context = False
     display_name = "Motivation & Recharge"
     description = (
         "Curated motivation hub with uplifting articles, videos, audio picks, "
@@ -15,104 +148,36 @@ class RechargePlugin(BasePlugin):
         return None
 
     def articles(self) -> list[dict]:
-        return [
-            {
-                "title": "How to Build Better Habits",
-                "source": "James Clear",
-                "url": "https://jamesclear.com/three-steps-habit-change",
-                "summary": "Practical habit framework for small, sustainable progress.",
-            },
-            {
-                "title": "Resilience Guide",
-                "source": "Mind UK",
-                "url": "https://www.mind.org.uk/information-support/tips-for-everyday-living/wellbeing/wellbeing/",
-                "summary": "Actionable tips for wellbeing, energy, and emotional resilience.",
-            },
-            {
-                "title": "Self-care for Stress",
-                "source": "CDC",
-                "url": "https://www.cdc.gov/howrightnow/taking-care/index.html",
-                "summary": "Evidence-based stress management and self-care recommendations.",
-            },
-            {
-                "title": "Tiny Joy Practices",
-                "source": "Greater Good Science Center",
-                "url": "https://greatergood.berkeley.edu/topic/happiness/definition",
-                "summary": "Science-backed ideas to add small moments of joy each day.",
-            },
-        ]
+        return list(_ARTICLES)
 
     def videos(self) -> list[dict]:
-        return [
-            {
-                "title": "How to Make Stress Your Friend",
-                "source": "TED",
-                "url": "https://www.ted.com/talks/kelly_mcgonigal_how_to_make_stress_your_friend",
-                "summary": "Reframing stress can improve confidence and outcomes.",
-            },
-            {
-                "title": "The Happy Secret to Better Work",
-                "source": "TED",
-                "url": "https://www.ted.com/talks/shawn_achor_the_happy_secret_to_better_work",
-                "summary": "Positive habits can unlock focus, creativity, and productivity.",
-            },
-            {
-                "title": "Guided Breathing for Calm",
-                "source": "YouTube",
-                "url": "https://www.youtube.com/watch?v=SEfs5TJZ6Nk",
-                "summary": "Short breathing video for grounding and mental reset.",
-            },
-        ]
+        return list(_VIDEOS)
 
     def audio(self) -> list[dict]:
-        return [
-            {
-                "title": "Meditation Minis",
-                "source": "Podcast",
-                "url": "https://meditationminis.com/podcast/",
-                "summary": "Short guided meditations for stress, sleep, and recharge.",
-            },
-            {
-                "title": "The Happiness Lab",
-                "source": "Podcast",
-                "url": "https://www.pushkin.fm/podcasts/the-happiness-lab-with-dr-laurie-santos",
-                "summary": "Psychology-based episodes on happiness and healthy habits.",
-            },
-            {
-                "title": "Nature Soundscapes",
-                "source": "YouTube Music",
-                "url": "https://music.youtube.com/search?q=nature+sounds+relax",
-                "summary": "Ambient audio for focus, rest, and decompression.",
-            },
-        ]
-
-    async def quote(self) -> dict:
-        fallback = {
-            "text": "Small steps every day still move you forward.",
-            "author": "AccessBot",
-            "source": "local",
-        }
-
-        try:
-            async with httpx.AsyncClient(timeout=httpx.Timeout(8.0, connect=4.0)) as client:
-                response = await client.get("https://zenquotes.io/api/random")
-                response.raise_for_status()
-                data = response.json()
-                if isinstance(data, list) and data:
-                    q = data[0]
-                    text = q.get("q") or ""
-                    # zenquotes returns this string when rate-limited
-                    if "too many requests" in text.lower() or not text:
-                        return fallback
-                    return {
-                        "text": text,
-                        "author": q.get("a") or "Unknown",
-                        "source": "zenquotes",
-                    }
-        except Exception:
-            pass
-
-        return fallback
+        return list(_AUDIO)
+
+    async def quote(self, fresh: bool = False) -> dict:
+        """Return a quote from cache, refreshing in the background once stale.
+
+        `fresh=True` waits for a live fetch (the "new quote" button); any
+        failure falls back to the cached quote, then to a local one.
+        """
+        global _refresh_task
+        cached = _quote_cache["data"]
+
+        if fresh or cached is None:
+            if not fresh:
+                # Coalesce first-load fetches: later waiters reuse the winner's result
+                async with _quote_lock:
+                    if _quote_cache["data"] is not None:
+                        return _quote_cache["data"]
+            data = await _refresh_quote()
+            return data or _quote_cache["data"]
+
+        stale = time.monotonic() - _quote_cache["fetched_at"] >= _QUOTE_FRESH_SECONDS
+        if stale and (_refresh_task is None or _refresh_task.done()):
+            _refresh_task = asyncio.create_task(_refresh_quote())
+        return cached
 
 
 recharge_plugin = RechargePlugin()
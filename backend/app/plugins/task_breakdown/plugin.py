@@ -4,6 +4,8 @@ from app.plugins.base_plugin import BasePlugin
 
 class TaskBreakdownPlugin(BasePlugin):
     name = "task_breakdown"
+    order = 60
+    provides_context = False
     display_name = "Task Breakdown Coach"
     description = "Turns overwhelming tasks into clear micro-steps with suggested timer blocks."
 
@@ -1,17 +1,24 @@
 # backend/app/routers/admin.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import itemgetter
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Dict, Any
-from app.core.database import get_db
+from app.core.database import get_db, SessionLocal
 from app.core.auth import get_current_user
+from app.core.etag import etag_for
 from app.models.user import User
 from app.models.settings import UserAISettings
-from app.models.conversation import Conversation, Message
+from app.models.conversation import Conversation, Message, wire_content
 from app.models.plugin import UserAnalytics
+from app.services.ai.router import AIRouter, invalidate_settings
 
-router = APIRouter()
+router = APIRouter(prefix="/admin", tags=["Admin"], default_response_class=ORJSONResponse)
 
 # Request/Response models
 class LLMSettings(BaseModel):
@@ -41,7 +48,7 @@ class LLMSettingsResponse(BaseModel):
     # Don't expose API key in response
 
 @router.get("/settings", response_model=LLMSettingsResponse)
-async def get_settings(
+def get_settings(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -77,7 +84,7 @@ async def get_settings(
     }
 
 @router.post("/settings")
-async def update_settings(
+def update_settings(
     settings_data: LLMSettings,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -119,6 +126,7 @@ async def update_settings(
         db.add(settings)
 
     db.commit()
+    invalidate_settings()
     return {"message": "Settings updated successfully"}
 
 @router.post("/test")
@@ -127,7 +135,6 @@ async def test_connection(
     db: Session = Depends(get_db)
 ):
     """Test the current LLM configuration without creating any conversation."""
-    from app.services.ai.router import AIRouter
     router_ai = AIRouter()
     try:
         settings = await router_ai.get_user_settings(current_user.id, db)
@@ -144,146 +151,183 @@ async def test_connection(
         raise HTTPException(status_code=503, detail=str(e))
 
 # LLM provider templates for easy configuration
+_PROVIDER_TEMPLATES = {
+    "templates": [
+        {
+            "name": "Claude (Anthropic)",
+            "provider_name": "Claude",
+            "api_format": "anthropic",
+            "api_endpoint": "https://api.anthropic.com/v1/messages",
+            "model_name": "claude-sonnet-4-20250514",
+            "auth_type": "bearer"
+        },
+        {
+            "name": "OpenAI",
+            "provider_name": "OpenAI",
+            "api_format": "openai",
+            "api_endpoint": "https://api.openai.com/v1/chat/completions",
+            "model_name": "gpt-4",
+            "auth_type": "bearer"
+        },
+        {
+            "name": "LM Studio (Local)",
+            "provider_name": "LM Studio",
+            "api_format": "openai",
+            "api_endpoint": "http://localhost:1234/v1/chat/completions",
+            "model_name": "",
+            "auth_type": "none"
+        },
+        {
+            "name": "Ollama (Local)",
+            "provider_name": "Ollama",
+            "api_format": "ollama",
+            "api_endpoint": "http://localhost:11434/api/chat",
+            "model_name": "llama2",
+            "auth_type": "none"
+        },
+        {
+            "name": "Groq",
+            "provider_name": "Groq",
+            "api_format": "openai",
+            "api_endpoint": "https://api.groq.com/openai/v1/chat/completions",
+            "model_name": "llama-3.1-70b-versatile",
+            "auth_type": "bearer"
+        },
+        {
+            "name": "Together.ai",
+            "provider_name": "Together",
+            "api_format": "openai",
+            "api_endpoint": "https://api.together.xyz/v1/chat/completions",
+            "model_name": "meta-llama/Llama-3-70b-chat-hf",
+            "auth_type": "bearer"
+        },
+        {
+            "name": "Custom",
+            "provider_name": "Custom Provider",
+            "api_format": "openai",
+            "api_endpoint": "https://your-api.com/v1/chat/completions",
+            "model_name": "your-model",
+            "auth_type": "bearer"
+        }
+    ]
+}
+
+# The payload never changes at runtime: serialize once and let clients cache it
+_TEMPLATES_BODY = orjson.dumps(_PROVIDER_TEMPLATES)
+_TEMPLATES_HEADERS = {
+    "ETag": etag_for(_TEMPLATES_BODY),
+    "Cache-Control": "public, max-age=86400",
+}
+
+
 @router.get("/templates")
-async def get_provider_templates():
+async def get_provider_templates(if_none_match: str | None = Header(default=None)):
     """Get pre-configured templates for popular providers"""
-    
-    return {
-        "templates": [
-            {
-                "name": "Claude (Anthropic)",
-                "provider_name": "Claude",
-                "api_format": "anthropic",
-                "api_endpoint": "https://api.anthropic.com/v1/messages",
-                "model_name": "claude-sonnet-4-20250514",
-                "auth_type": "bearer"
-            },
-            {
-                "name": "OpenAI",
-                "provider_name": "OpenAI",
-                "api_format": "openai",
-                "api_endpoint": "https://api.openai.com/v1/chat/completions",
-                "model_name": "gpt-4",
-                "auth_type": "bearer"
-            },
-            {
-                "name": "LM Studio (Local)",
-                "provider_name": "LM Studio",
-                "api_format": "openai",
-                "api_endpoint": "http://localhost:1234/v1/chat/completions",
-                "model_name": "",
-                "auth_type": "none"
-            },
-            {
-                "name": "Ollama (Local)",
-                "provider_name": "Ollama",
-                "api_format": "ollama",
-                "api_endpoint": "http://localhost:11434/api/chat",
-                "model_name": "llama2",
-                "auth_type": "none"
-            },
-            {
-                "name": "Groq",
-                "provider_name": "Groq",
-                "api_format": "openai",
-                "api_endpoint": "https://api.groq.com/openai/v1/chat/completions",
-                "model_name": "llama-3.1-70b-versatile",
-                "auth_type": "bearer"
-            },
-            {
-                "name": "Together.ai",
-                "provider_name": "Together",
-                "api_format": "openai",
-                "api_endpoint": "https://api.together.xyz/v1/chat/completions",
-                "model_name": "meta-llama/Llama-3-70b-chat-hf",
-                "auth_type": "bearer"
-            },
-            {
-                "name": "Custom",
-                "provider_name": "Custom Provider",
-                "api_format": "openai",
-                "api_endpoint": "https://your-api.com/v1/chat/completions",
-                "model_name": "your-model",
-                "auth_type": "bearer"
-            }
-        ]
-    }
+    if if_none_match and _TEMPLATES_HEADERS["ETag"] in if_none_match:
+        return Response(status_code=304, headers=_TEMPLATES_HEADERS)
+    return Response(_TEMPLATES_BODY, media_type="application/json", headers=_TEMPLATES_HEADERS)
+
+
+def _export_stream(user_id: int, head: dict):
+    """
+    Yield the export document piece by piece, one conversation at a time.
+    Uses its own session: the request's session is closed before streaming starts.
+    Rows are plain column tuples (no ORM entities), fetched in yield_per batches.
+    """
+    dumps = orjson.dumps   # bound once; called per conversation / mood row
+    db = SessionLocal()
+    try:
+        # Same document shape as before — open the object, then stream the arrays.
+        # orjson writes datetimes as ISO 8601 itself.
+        yield dumps(head)[:-1] + b',"conversations":['
+
+        # One ordered outer join; consecutive rows of a conversation are grouped below
+        rows = db.execute(
+            select(
+                Conversation.id,
+                Conversation.title,
+                Conversation.created_at,
+                Conversation.updated_at,
+                Message.role,
+                Message.content,
+                Message.image_url,
+                Message.created_at,
+            )
+            .outerjoin(Message, Message.conversation_id == Conversation.id)
+            .where(Conversation.user_id == user_id)
+            .order_by(Conversation.created_at, Conversation.id, Message.created_at, Message.id)
+            .execution_options(yield_per=500)
+        )
+        sep = b""
+        for _, group in groupby(rows, key=itemgetter(0)):
+            group = list(group)
+            conv_id, title, created_at, updated_at = group[0][:4]
+            yield sep + dumps({
+                "id": conv_id,
+                "title": title,
+                "created_at": created_at,
+                "updated_at": updated_at,
+                "messages": [
+                    {"role": role, "content": wire_content(content, image_url), "created_at": msg_created_at}
+                    for *_, role, content, image_url, msg_created_at in group
+                    if role is not None   # conversation with no messages
+                ],
+            })
+            sep = b","
+
+        yield b'],"mood_history":['
+
+        mood_rows = db.execute(
+            select(
+                UserAnalytics.metric_value["mood"].as_string(),
+                UserAnalytics.metric_value["note"].as_string(),
+                UserAnalytics.recorded_at,
+            )
+            .where(
+                UserAnalytics.user_id == user_id,
+                UserAnalytics.metric_type == "checkin",
+            )
+            .order_by(UserAnalytics.recorded_at)
+            .execution_options(yield_per=500)
+        )
+        sep = b""
+        for mood, note, recorded_at in mood_rows:
+            yield sep + dumps({
+                "mood":        mood,
+                "note":        note,
+                "recorded_at": recorded_at,
+            })
+            sep = b","
+
+        yield b"]}"
+    finally:
+        db.close()
 
 
 @router.get("/export")
 async def export_user_data(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
 ):
     """
     Download all user data as JSON.
     Includes: profile, all conversations + messages, mood history.
     API keys are NOT exported for security.
+    Streamed, so memory stays flat and the download starts immediately.
     """
-    conversations = (
-        db.query(Conversation)
-        .filter(Conversation.user_id == current_user.id)
-        .order_by(Conversation.created_at)
-        .all()
-    )
-
-    export_convos = []
-    for conv in conversations:
-        msgs = (
-            db.query(Message)
-            .filter(Message.conversation_id == conv.id)
-            .order_by(Message.created_at)
-            .all()
-        )
-        export_convos.append({
-            "id": conv.id,
-            "title": conv.title,
-            "created_at": conv.created_at.isoformat() if conv.created_at else None,
-            "updated_at": conv.updated_at.isoformat() if conv.updated_at else None,
-            "messages": [
-                {
-                    "role": m.role,
-                    "content": m.content,
-                    "created_at": m.created_at.isoformat() if m.created_at else None,
-                }
-                for m in msgs
-            ],
-        })
-
-    mood_rows = (
-        db.query(UserAnalytics)
-        .filter(
-            UserAnalytics.user_id == current_user.id,
-            UserAnalytics.metric_type == "checkin",
-        )
-        .order_by(UserAnalytics.recorded_at)
-        .all()
-    )
-
-    export_mood = [
-        {
-            "mood":        row.metric_value.get("mood"),
-            "note":        row.metric_value.get("note"),
-            "recorded_at": row.recorded_at.isoformat() if row.recorded_at else None,
-        }
-        for row in mood_rows
-    ]
-
-    payload = {
+    head = {
         "export_version": "1.0",
-        "exported_at": __import__("datetime").datetime.utcnow().isoformat() + "Z",
+        "exported_at": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
         "profile": {
             "username": current_user.username,
             "email": current_user.email,
             "member_since": current_user.created_at.isoformat() if current_user.created_at else None,
         },
-        "conversations": export_convos,
-        "mood_history": export_mood,
     }
 
-    return JSONResponse(
-        content=payload,
+    return StreamingResponse(
+        _export_stream(current_user.id, head),
+        media_type="application/json",
         headers={
             "Content-Disposition": f'attachment; filename="accessbot_export_{current_user.username}.json"'
         },
-    )
\ No newline at end of file
+    )
@@ -4,22 +4,30 @@ Analytics & Insights API
 Provides mood trends, streaks, and wellness summaries derived from
 the user_analytics table (populated by the mood_tracker plugin).
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import Date, distinct, func, select
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Dict, Optional
-from datetime import date, datetime, timedelta, timezone
+import time
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from datetime import date, timedelta
 
-from app.core.database import get_db
+from app.core.database import get_db, utc_today_start
 from app.core.auth import get_current_user
+from app.core.etag import etag_response
 from app.models.user import User
 from app.models.plugin import UserAnalytics
 from app.models.conversation import Conversation, Message
 
-router = APIRouter()
+router = APIRouter(prefix="/analytics", tags=["Analytics"], default_response_class=ORJSONResponse)
 
 
 # ── Response models ───────────────────────────────────────────────────────────
+# Built only from server-side data, so they are created with model_construct()
+# (no validation) and serialized once with model_dump_json().
 
 class MoodPoint(BaseModel):
     date: str           # YYYY-MM-DD
@@ -79,157 +87,178 @@ MOOD_SCORE: Dict[str, int] = {
 }
 
 
+# ── Insights cache ────────────────────────────────────────────────────────────
+# { user_id: {(days, today): (cached_at, (trend, streak, distribution, weekly))} }
+# Only the check-in derived parts are cached; usage counts are always live.
+# Check-in writes call invalidate_insights(); the TTL covers other workers.
+_insights_cache: dict[int, dict] = {}
+INSIGHTS_TTL_SECONDS = 300
+
+
+def invalidate_insights(user_id: int) -> None:
+    """Drop a user's cached insights after their check-ins change."""
+    _insights_cache.pop(user_id, None)
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
-def _get_checkins(user_id: int, db: Session, days: int = 90) -> List[UserAnalytics]:
-    since = datetime.combine(
-        date.today() - timedelta(days=days),
-        datetime.min.time()
-    ).replace(tzinfo=timezone.utc)
-    return (
-        db.query(UserAnalytics)
-        .filter(
+def _get_checkins(user_id: int, db: Session, days: int = 90) -> list:
+    """(recorded_at, mood, note) rows from the last `days` days, oldest first."""
+    return db.execute(
+        select(
+            UserAnalytics.recorded_at,
+            UserAnalytics.metric_value["mood"].as_string(),
+            UserAnalytics.metric_value["note"].as_string(),
+        )
+        .where(
             UserAnalytics.user_id == user_id,
             UserAnalytics.metric_type == "checkin",
-            UserAnalytics.recorded_at >= since,
+            UserAnalytics.recorded_at >= utc_today_start(db) - timedelta(days=days),
         )
         .order_by(UserAnalytics.recorded_at)
-        .all()
-    )
+    ).all()
+
+
+def _get_checkin_days(user_id: int, db: Session) -> set[int]:
+    """Ordinals of every distinct day with a check-in — only dates cross the wire."""
+    day = func.date(UserAnalytics.recorded_at, type_=Date)
+    rows = db.execute(
+        select(day).distinct().where(
+            UserAnalytics.user_id == user_id,
+            UserAnalytics.metric_type == "checkin",
+        )
+    ).scalars()
+    return {d.toordinal() for d in rows}
+
+
+def _calc_streak(day_ords: set[int]) -> StreakInfo:
+    if not day_ords:
+        return StreakInfo.model_construct(current=0, longest=0, last_checkin=None)
+
+    # Unique check-in days as sorted ordinals; runs[i] = streak length ending at ords[i]
+    ords = sorted(day_ords)
+    runs = [1] * len(ords)
+    for i in range(1, len(ords)):
+        if ords[i] - ords[i - 1] == 1:
+            runs[i] = runs[i - 1] + 1
 
+    # Current streak ends today, or yesterday if nothing logged yet today
+    today = date.today().toordinal()
+    i = bisect_right(ords, today) - 1
+    current = runs[i] if i >= 0 and today - ords[i] <= 1 else 0
 
-def _calc_streak(checkins: List[UserAnalytics]) -> StreakInfo:
-    if not checkins:
-        return StreakInfo(current=0, longest=0, last_checkin=None)
-
-    # Unique days that have a check-in
-    days_with_checkin = sorted({row.recorded_at.date() for row in checkins})
-    today = date.today()
-
-    # Current streak (counting backwards from today)
-    current = 0
-    check = today
-    day_set = set(days_with_checkin)
-    while check in day_set:
-        current += 1
-        check -= timedelta(days=1)
-    # if nothing today and yesterday had one, treat yesterday as start
-    if current == 0 and (today - timedelta(days=1)) in day_set:
-        check = today - timedelta(days=1)
-        while check in day_set:
-            current += 1
-            check -= timedelta(days=1)
-
-    # Longest streak
-    longest = 1
-    run = 1
-    for i in range(1, len(days_with_checkin)):
-        if (days_with_checkin[i] - days_with_checkin[i - 1]).days == 1:
-            run += 1
-            longest = max(longest, run)
-        else:
-            run = 1
-
-    last = days_with_checkin[-1].isoformat() if days_with_checkin else None
-    return StreakInfo(current=current, longest=longest, last_checkin=last)
-
-
-def _calc_distribution(points: List[MoodPoint]) -> List[MoodDistribution]:
-    counts: Dict[str, int] = {}
-    for p in points:
-        counts[p.mood] = counts.get(p.mood, 0) + 1
+    last = date.fromordinal(ords[-1]).isoformat()
+    return StreakInfo.model_construct(current=current, longest=max(runs), last_checkin=last)
+
+
+def _calc_distribution(counts: Counter) -> List[MoodDistribution]:
     total = sum(counts.values()) or 1
     order = ["great", "good", "okay", "tired", "struggling"]
     result = []
     for mood in order:
         if mood in counts:
-            result.append(MoodDistribution(
+            result.append(MoodDistribution.model_construct(
                 mood=mood,
-                emoji=MOOD_EMOJI.get(mood, ""),
+                emoji=MOOD_EMOJI[mood],
                 count=counts[mood],
                 percentage=round(counts[mood] / total * 100, 1),
             ))
     return result
 
 
-def _calc_weekly_summaries(points: List[MoodPoint]) -> List[WeekSummary]:
-    weeks: Dict[date, List[MoodPoint]] = {}
-    for p in points:
-        d = date.fromisoformat(p.date)
-        # Monday of that week
-        monday = d - timedelta(days=d.weekday())
-        weeks.setdefault(monday, []).append(p)
-
+def _calc_weekly_summaries(weeks: Dict[date, List[tuple]]) -> List[WeekSummary]:
+    """`weeks` maps each week's Monday to its (mood, score) pairs, in check-in order."""
     summaries = []
     for monday in sorted(weeks.keys())[-8:]:  # last 8 weeks max
         week_points = weeks[monday]
-        scores = [MOOD_SCORE.get(p.mood, 3) for p in week_points]
-        avg = round(sum(scores) / len(scores), 2)
+        avg = round(sum(score for _, score in week_points) / len(week_points), 2)
 
         # Dominant mood
-        counts: Dict[str, int] = {}
-        for p in week_points:
-            counts[p.mood] = counts.get(p.mood, 0) + 1
+        counts = Counter(mood for mood, _ in week_points)
         dominant = max(counts, key=counts.__getitem__) if counts else None
 
-        summaries.append(WeekSummary(
+        summaries.append(WeekSummary.model_construct(
             week_start=monday.isoformat(),
             average_score=avg,
             dominant_mood=dominant,
-            dominant_emoji=MOOD_EMOJI.get(dominant, "") if dominant else "",
+            dominant_emoji=MOOD_EMOJI[dominant] if dominant else "",
             checkin_count=len(week_points),
         ))
     return summaries
 
 
+def _mood_insights(user_id: int, db: Session, days: int):
+    """Trend, streak, distribution and weekly summaries from the user's check-ins."""
+    checkins = _get_checkins(user_id, db, days=max(days, 90))
+    cutoff = date.today() - timedelta(days=days)
+
+    # One pass feeds every aggregate; the trend is trimmed to the requested
+    # window while distribution/weekly use the full fetched range.
+    trend_window: List[MoodPoint] = []
+    dist_counts: Counter = Counter()
+    weeks: Dict[date, List[tuple]] = defaultdict(list)
+    score_of, emoji_of = MOOD_SCORE, MOOD_EMOJI   # locals for the hot loop
+    for recorded_at, mood, note in checkins:
+        # Missing or unknown (legacy) moods count as "okay", so plain indexing is safe
+        if mood not in score_of:
+            mood = "okay"
+        score = score_of[mood]
+        d = recorded_at.date()
+
+        if d >= cutoff:
+            trend_window.append(MoodPoint.model_construct(
+                date=d.isoformat(),
+                mood=mood,
+                emoji=emoji_of[mood],
+                score=score,
+                note=note or None,
+            ))
+        dist_counts[mood] += 1
+        weeks[d - timedelta(days=d.weekday())].append((mood, score))
+
+    # Streaks span all history, not just the fetched window
+    streak = _calc_streak(_get_checkin_days(user_id, db))
+    distribution = _calc_distribution(dist_counts)
+    weekly = _calc_weekly_summaries(weeks)
+    return trend_window, streak, distribution, weekly
+
+
 # ── Endpoints ─────────────────────────────────────────────────────────────────
 
 @router.get("/insights", response_model=InsightsResponse)
-async def get_insights(
+def get_insights(
     days: int = 30,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
+    if_none_match: str | None = Header(default=None),
 ):
     """
     Returns mood trend data, streak, distribution, and usage stats
     for the authenticated user.
+    Tagged with an ETag so polling clients get an empty 304 when nothing changed.
     """
-    checkins = _get_checkins(current_user.id, db, days=max(days, 90))
-
-    trend: List[MoodPoint] = []
-    for row in checkins:
-        mood = row.metric_value.get("mood", "okay")
-        trend.append(MoodPoint(
-            date=row.recorded_at.strftime("%Y-%m-%d"),
-            mood=mood,
-            emoji=MOOD_EMOJI.get(mood, ""),
-            score=MOOD_SCORE.get(mood, 3),
-            note=row.metric_value.get("note") or None,
-        ))
-
-    # Trim trend to requested window
-    cutoff = (date.today() - timedelta(days=days)).isoformat()
-    trend_window = [p for p in trend if p.date >= cutoff]
-
-    streak = _calc_streak(checkins)
-    distribution = _calc_distribution(trend)
-    weekly = _calc_weekly_summaries(trend)
-
-    # Usage stats
-    total_msgs = (
-        db.query(Message)
-        .join(Conversation, Conversation.id == Message.conversation_id)
-        .filter(Conversation.user_id == current_user.id)
-        .count()
-    )
-    total_convos = (
-        db.query(Conversation)
+    key = (days, date.today())
+    cached = _insights_cache.get(current_user.id, {}).get(key)
+    if cached and time.monotonic() - cached[0] < INSIGHTS_TTL_SECONDS:
+        trend_window, streak, distribution, weekly = cached[1]
+    else:
+        trend_window, streak, distribution, weekly = _mood_insights(current_user.id, db, days)
+        entries = _insights_cache.setdefault(current_user.id, {})
+        if len(entries) >= 8 or any(k[1] != key[1] for k in entries):
+            entries.clear()   # new day, or too many distinct `days` values
+        entries[key] = (time.monotonic(), (trend_window, streak, distribution, weekly))
+
+    # Usage stats — both counts in one round-trip
+    total_convos, total_msgs = (
+        db.query(func.count(distinct(Conversation.id)), func.count(Message.id))
+        .select_from(Conversation)
+        .outerjoin(Message, Message.conversation_id == Conversation.id)
         .filter(Conversation.user_id == current_user.id)
-        .count()
+        .one()
     )
     member_since = current_user.created_at.strftime("%Y-%m-%d") if hasattr(current_user, "created_at") and current_user.created_at else "unknown"
 
-    return InsightsResponse(
+    response = InsightsResponse.model_construct(
         trend=trend_window,
         streak=streak,
         distribution=distribution,
@@ -238,3 +267,5 @@ async def get_insights(
         total_conversations=total_convos,
         member_since=member_since,
     )
+    # Straight from the models to JSON bytes, without the intermediate dict
+    return etag_response(response.model_dump_json().encode(), if_none_match)
@@ -1,17 +1,26 @@
 # backend/app/routers/auth.py
 from app.core.auth import get_current_user
 from datetime import timedelta, datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional, List
 import logging
-from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.database import get_db, SessionLocal
+from app.core.etag import etag_response
+from app.core.security import (
+    get_password_hash,
+    get_password_hash_async,
+    verify_password_async,
+    create_access_token,
+)
 from app.models.user import User
 from app.config import settings
 
-router = APIRouter()
+router = APIRouter(prefix="/auth", tags=["Authentication"], default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
 # ── Request / Response models ─────────────────────────────────────
@@ -50,26 +59,74 @@ class AccountUpdate(BaseModel):
 
 # ── Helper ────────────────────────────────────────────────────────
 
-def _user_count(db: Session) -> int:
-    return db.query(User).count()
-
-def _create_user(db: Session, username: str, password: str, email: Optional[str] = None) -> User:
-    """Shared user-creation logic (checks duplicates, hashes password)."""
-    if db.query(User).filter(User.username == username).first():
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Username already taken")
-    if email and db.query(User).filter(User.email == email).first():
-        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Email already registered")
+# Once a user exists this never flips back (admins can't delete their own
+# account), so after the first True it's answered without touching the DB.
+_users_exist = False
+
+def _any_user(db: Session) -> bool:
+    global _users_exist
+    if not _users_exist:
+        _users_exist = db.query(User.id).limit(1).first() is not None
+    return _users_exist
+
+def _duplicate_detail(exc: IntegrityError) -> str | None:
+    """Message for a unique violation on users.username/email; None for any other integrity error."""
+    orig = exc.orig
+    diag = getattr(orig, "diag", None)
+    if diag is not None:   # psycopg2 reports the SQLSTATE and names the constraint
+        if getattr(orig, "pgcode", None) != "23505":   # unique_violation
+            return None
+        name = diag.constraint_name or ""
+    else:                  # SQLite: "UNIQUE constraint failed: users.username"
+        name = str(orig)
+        if not name.startswith("UNIQUE constraint failed"):
+            return None
+    name = name.lower()
+    if "email" in name:
+        return "Email already registered"
+    if "username" in name:
+        return "Username already taken"
+    return None
+
+def _commit_user(db: Session) -> None:
+    """Commit user changes; the unique constraints decide on duplicates."""
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        detail = _duplicate_detail(exc)
+        if detail is None:
+            raise
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail)
+
+async def _create_user(db: Session, username: str, password: str, email: Optional[str] = None) -> User:
+    """Shared user-creation logic (hashes password, rejects duplicates)."""
+    global _users_exist
     user = User(
         username=username,
         email=email,
-        password_hash=get_password_hash(password),
+        password_hash=await get_password_hash_async(password),
         is_active=True,
     )
     db.add(user)
-    db.commit()
+    _commit_user(db)
     db.refresh(user)
+    _users_exist = True
     return user
 
+# Verified against when the username doesn't exist, so a miss costs the same
+# bcrypt work as a wrong password and response time doesn't reveal valid usernames
+_DUMMY_HASH = get_password_hash("x" * 12)
+
+def _record_auth_event(user_id: int, **fields) -> None:
+    """Persist last-login/logout audit fields; runs as a background task after the response."""
+    db = SessionLocal()
+    try:
+        db.execute(update(User).where(User.id == user_id).values(**fields))
+        db.commit()
+    finally:
+        db.close()
+
 def _request_meta(request: Request) -> tuple[str, str]:
     forwarded_for = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
     client_ip = forwarded_for or (request.client.host if request.client else "unknown")
@@ -79,13 +136,12 @@ def _request_meta(request: Request) -> tuple[str, str]:
 # ── Public: setup status ──────────────────────────────────────────
 
 @router.get("/setup-status")
-async def setup_status(db: Session = Depends(get_db)):
+def setup_status(db: Session = Depends(get_db)):
     """
     Returns whether first-time setup is still required.
     The frontend uses this to show/hide the Register form.
     """
-    count = _user_count(db)
-    return {"setup_required": count == 0, "user_count": count}
+    return {"setup_required": not _any_user(db)}
 
 # ── Public: first-time registration ──────────────────────────────
 
@@ -95,21 +151,27 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
     Self-registration — only allowed when no users exist yet (initial setup).
     After the first account is created, use the admin endpoint to add more users.
     """
-    if _user_count(db) > 0:
+    if _any_user(db):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Registration is closed. Ask an admin to create your account.",
         )
-    return _create_user(db, user_data.username, user_data.password, user_data.email)
+    return await _create_user(db, user_data.username, user_data.password, user_data.email)
 
 # ── Public: login ─────────────────────────────────────────────────
 
 @router.post("/login", response_model=Token)
-async def login(credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
+async def login(
+    credentials: UserLogin,
+    request: Request,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     """Login and get access token"""
     client_ip, user_agent = _request_meta(request)
     user = db.query(User).filter(User.username == credentials.username).first()
-    if not user or not verify_password(credentials.password, user.password_hash):
+    password_ok = await verify_password_async(credentials.password, user.password_hash if user else _DUMMY_HASH)
+    if not user or not password_ok:
         logger.warning(
             "AUTH_LOGIN_FAILED username=%s ip=%s user_agent=%s reason=bad_credentials",
             credentials.username,
@@ -127,9 +189,9 @@ async def login(credentials: UserLogin, request: Request, db: Session = Depends(
         )
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "Inactive user")
 
-    user.last_login_at = datetime.now(timezone.utc)
-    user.last_login_ip = client_ip
-    db.commit()
+    # The audit write doesn't need to delay the token
+    login_at = datetime.now(timezone.utc)
+    background_tasks.add_task(_record_auth_event, user.id, last_login_at=login_at, last_login_ip=client_ip)
 
     logger.info(
         "AUTH_LOGIN_SUCCESS user_id=%s username=%s email=%s ip=%s user_agent=%s last_login_at=%s",
@@ -138,7 +200,7 @@ async def login(credentials: UserLogin, request: Request, db: Session = Depends(
         user.email or "",
         client_ip,
         user_agent,
-        user.last_login_at.isoformat() if user.last_login_at else "",
+        login_at.isoformat(),
     )
 
     access_token = create_access_token(
@@ -148,16 +210,15 @@ async def login(credentials: UserLogin, request: Request, db: Session = Depends(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/logout")
-async def logout(
+def logout(
     request: Request,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
 ):
     """Best-effort logout audit endpoint (JWT remains stateless)."""
     client_ip, user_agent = _request_meta(request)
-    current_user.last_logout_at = datetime.now(timezone.utc)
-    current_user.last_logout_ip = client_ip
-    db.commit()
+    logout_at = datetime.now(timezone.utc)
+    background_tasks.add_task(_record_auth_event, current_user.id, last_logout_at=logout_at, last_logout_ip=client_ip)
 
     logger.info(
         "AUTH_LOGOUT user_id=%s username=%s email=%s ip=%s user_agent=%s last_logout_at=%s",
@@ -166,16 +227,20 @@ async def logout(
         current_user.email or "",
         client_ip,
         user_agent,
-        current_user.last_logout_at.isoformat() if current_user.last_logout_at else "",
+        logout_at.isoformat(),
     )
     return {"ok": True}
 
 # ── Authenticated: current user ───────────────────────────────────
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
-    """Get current user information"""
-    return current_user
+async def get_current_user_info(
+    current_user: User = Depends(get_current_user),
+    if_none_match: str | None = Header(default=None),
+):
+    """Get current user information (304 if unchanged since the client's copy)"""
+    body = UserResponse.model_validate(current_user).model_dump_json().encode()
+    return etag_response(body, if_none_match)
 
 @router.put("/me", response_model=UserResponse)
 async def update_account(
@@ -189,35 +254,32 @@ async def update_account(
     """
     # ── Username change
     if data.new_username and data.new_username != current_user.username:
-        if db.query(User).filter(User.username == data.new_username).first():
-            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Username already taken")
         current_user.username = data.new_username
 
     # ── Email change (allow clearing with empty string)
     if data.new_email is not None:
-        new_email = data.new_email.strip() or None
-        if new_email and new_email != current_user.email:
-            if db.query(User).filter(User.email == new_email).first():
-                raise HTTPException(status.HTTP_400_BAD_REQUEST, "Email already registered")
-        current_user.email = new_email
+        current_user.email = data.new_email.strip() or None
 
     # ── Password change
     if data.new_password:
         if not data.current_password:
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Current password required to set a new one")
-        if not verify_password(data.current_password, current_user.password_hash):
+        if not await verify_password_async(data.current_password, current_user.password_hash):
             raise HTTPException(status.HTTP_400_BAD_REQUEST, "Current password is incorrect")
-        current_user.password_hash = get_password_hash(data.new_password)
+        current_user.password_hash = await get_password_hash_async(data.new_password)
 
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    # Snapshot the response first: the commit expires the row, and
+    # reading it afterwards would re-SELECT what we already hold
+    response = UserResponse.model_validate(current_user)
+    # Username/email clashes surface as unique violations here
+    _commit_user(db)
+    return response
 
 # ── Admin: user management ────────────────────────────────────────
 # Every authenticated user is treated as admin (single-tenant app).
 
 @router.get("/users", response_model=List[UserResponse])
-async def list_users(
+def list_users(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -231,10 +293,10 @@ async def admin_create_user(
     db: Session = Depends(get_db),
 ):
     """Admin: create a new user account."""
-    return _create_user(db, user_data.username, user_data.password, user_data.email)
+    return await _create_user(db, user_data.username, user_data.password, user_data.email)
 
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def admin_delete_user(
+def admin_delete_user(
     user_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -242,8 +304,10 @@ async def admin_delete_user(
     """Admin: delete a user account. Cannot delete your own account."""
     if user_id == current_user.id:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, "You cannot delete your own account")
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # One DELETE; conversations, messages and plugin data go via ON DELETE CASCADE,
+    # and the shared AI settings row is kept with its owner set to NULL
+    result = db.execute(delete(User).where(User.id == user_id))
+    if not result.rowcount:
+        db.rollback()
         raise HTTPException(status.HTTP_404_NOT_FOUND, "User not found")
-    db.delete(user)
     db.commit()
\ No newline at end of file
@@ -1,20 +1,26 @@
 # backend/app/routers/chat.py
+import asyncio
+import json
+from contextlib import asynccontextmanager
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import or_
 from sqlalchemy.sql import func
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta, timezone
+from app.config import settings
 from app.core.database import get_db
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_before, keyset_order
 from app.core.auth import get_current_user
 from app.models.user import User
-from app.models.conversation import Conversation, Message
+from app.models.conversation import Conversation, Message, wire_content
 from app.services.ai.router import ai_router
 from app.plugins.manager import plugin_manager
 from app.models.plugin import UserAnalytics
 
-router = APIRouter()
+router = APIRouter(prefix="/chat", tags=["Chat"], default_response_class=ORJSONResponse)
 
 # Request/Response models
 class ChatMessage(BaseModel):
@@ -52,6 +58,62 @@ class ConversationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# ── /send concurrency ─────────────────────────────────────────────
+# An LLM round trip can hold a request open for minutes. Cap how many run at
+# once per worker and per user; extra requests wait their turn instead of piling on.
+_user_inflight: dict[int, asyncio.Semaphore] = {}
+_user_pending: dict[int, int] = {}   # requests holding or waiting on a user's semaphore
+_send_slots: asyncio.Semaphore | None = None
+
+@asynccontextmanager
+async def _chat_slot(user_id: int):
+    global _send_slots
+    if _send_slots is None:
+        _send_slots = asyncio.Semaphore(settings.CHAT_MAX_CONCURRENCY)
+    sem = _user_inflight.setdefault(user_id, asyncio.Semaphore(settings.CHAT_MAX_PER_USER))
+    _user_pending[user_id] = _user_pending.get(user_id, 0) + 1
+    try:
+        async with sem, _send_slots:
+            yield
+    finally:
+        # Drop idle users so the map doesn't grow with every account that ever chatted
+        _user_pending[user_id] -= 1
+        if not _user_pending[user_id]:
+            del _user_pending[user_id]
+            del _user_inflight[user_id]
+
+# ── AI message formatting ─────────────────────────────────────────
+def _history_message(role: str, content: str, image: str | None) -> dict:
+    """Earlier turns go as text only — the image is only sent with the current turn."""
+    if image is None and content.startswith('{"text"'):
+        # Older rows stored images as a JSON envelope in content
+        try:
+            parsed = json.loads(content)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict):
+            content = parsed.get("text") or ""
+            image = parsed.get("image") or None
+    if image:
+        content += " [User attached an image]"
+    return {"role": role, "content": content}
+
+def _build_ai_message(role: str, content: str, image: str | None, vision_enabled: bool, api_format: str) -> dict:
+    """Returns a message dict, using multipart content for user messages with images if vision is on.
+    (OpenAI vision format, also supported by LM Studio vision models)"""
+    if image and vision_enabled and api_format in ("openai", "ollama"):
+        # OpenAI vision multipart format (also used by LM Studio, Ollama)
+        return {
+            "role": role,
+            "content": [
+                {"type": "text", "text": content},
+                {"type": "image_url", "image_url": {"url": image}},
+            ]
+        }
+    # Vision disabled or unsupported format — fall back to text with note
+    img_note = " [User attached an image — vision is not enabled for this model]" if image else ""
+    return {"role": role, "content": content + img_note}
+
 @router.post("/send", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
@@ -60,14 +122,21 @@ async def send_message(
 ):
     """Send a chat message and get AI response"""
 
-    def _touch_conversation(conv: Conversation):
-        conv.updated_at = func.now()
-        db.add(conv)
+    def _save_turn(message: Message, touch: bool = False) -> int:
+        """Add a message (optionally bumping the conversation) in one commit; returns the message id."""
+        db.add(message)
+        if touch:
+            conversation.updated_at = func.now()
+        db.flush()                 # assigns the id, so no refresh is needed after commit
+        message_id = message.id
         db.commit()
+        return message_id
     
     # Get or create conversation
+    is_new = False
     if request.conversation_id:
-        conversation = db.query(Conversation).filter(
+        # Conversation and its history in a single round trip
+        conversation = db.query(Conversation).options(joinedload(Conversation.messages)).filter(
             Conversation.id == request.conversation_id,
             Conversation.user_id == current_user.id
         ).first()
@@ -77,6 +146,8 @@ async def send_message(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Conversation not found"
             )
+        # Snapshot the history now: the commits below expire the loaded rows
+        history = [(msg.role, msg.content, msg.image_url) for msg in conversation.messages]
     else:
         # Try to continue the most recent incomplete conversation first.
         # This prevents duplicate sessions when a prior request timed out.
@@ -89,81 +160,54 @@ async def send_message(
 
         should_reuse = False
         if conversation:
-            last_message = (
-                db.query(Message)
+            # Only the last role matters here; the full history is loaded if we reuse
+            last_role = (
+                db.query(Message.role)
                 .filter(Message.conversation_id == conversation.id)
-                .order_by(Message.created_at.desc())
-                .first()
+                .order_by(Message.created_at.desc(), Message.id.desc())
+                .limit(1)
+                .scalar()
             )
-            if last_message and last_message.role == "user" and conversation.updated_at:
+            if last_role == "user" and conversation.updated_at:
                 conv_updated = conversation.updated_at
                 if conv_updated.tzinfo is None:
                     conv_updated = conv_updated.replace(tzinfo=timezone.utc)
                 should_reuse = (datetime.now(timezone.utc) - conv_updated) <= timedelta(minutes=20)
 
-        if not should_reuse:
+        if should_reuse:
+            history = [(msg.role, msg.content, msg.image_url) for msg in conversation.messages]   # lazy load
+        else:
+            history = []
+            is_new = True
             conversation = Conversation(
                 user_id=current_user.id,
                 title=request.message[:50] if len(request.message) > 50 else request.message
             )
             db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-    
-    # Save user message — store as JSON if an image is attached
-    import json as _json
-    if request.image_data:
-        stored_content = _json.dumps({"text": request.message, "image": request.image_data})
-    else:
-        stored_content = request.message
+            db.flush()             # committed together with the first message
+    conv_id = conversation.id
 
-    user_message = Message(
-        conversation_id=conversation.id,
+    # Save user message — an attached image goes in its own column.
+    # Committed before the AI call so it survives a failed or slow response.
+    # updated_at tracks the user's last message (a new conversation's server
+    # default already covers it); assistant replies don't bump it again.
+    _save_turn(Message(
+        conversation_id=conv_id,
         role="user",
-        content=stored_content
-    )
-    db.add(user_message)
-    db.commit()
-    _touch_conversation(conversation)
-    
-    # Get conversation history
-    messages = db.query(Message).filter(
-        Message.conversation_id == conversation.id
-    ).order_by(Message.created_at).all()
+        content=request.message,
+        image_url=request.image_data or None,
+    ), touch=not is_new)
     
+    history.append(("user", request.message, request.image_data or None))
+
     # Get AI settings once so we know if vision is enabled
     ai_settings = await ai_router.get_user_settings(current_user.id, db)
     vision_enabled = ai_settings.get("vision_enabled", False)
     api_format = ai_settings.get("api_format", "openai")
 
     # Format messages for AI
-    # When vision is enabled and the message has an image, build a multipart content array
-    # (OpenAI vision format, also supported by LM Studio vision models)
-    import json as _json
-    def _build_ai_message(role: str, content: str):
-        """Returns a message dict, using multipart content for user messages with images if vision is on."""
-        try:
-            parsed = _json.loads(content)
-            if isinstance(parsed, dict) and "text" in parsed:
-                text = parsed.get("text") or ""
-                image = parsed.get("image") or ""
-                if image and vision_enabled and api_format in ("openai", "ollama"):
-                    # OpenAI vision multipart format (also used by LM Studio, Ollama)
-                    return {
-                        "role": role,
-                        "content": [
-                            {"type": "text", "text": text},
-                            {"type": "image_url", "image_url": {"url": image}},
-                        ]
-                    }
-                # Vision disabled or unsupported format — fall back to text with note
-                img_note = " [User attached an image — vision is not enabled for this model]" if image else ""
-                return {"role": role, "content": text + img_note}
-        except Exception:
-            pass
-        return {"role": role, "content": content}
-
-    ai_messages = [_build_ai_message(msg.role, msg.content) for msg in messages]
+    ai_messages = [_history_message(*msg) for msg in history[:-1]]
+    ai_messages.append(_build_ai_message(*history[-1], vision_enabled, api_format))
     
     # Prepend plugin context as a system message (if any plugins have context)
     plugin_context = await plugin_manager.collect_ai_context(current_user.id, db)
@@ -177,7 +221,8 @@ async def send_message(
     
     # Get AI response
     try:
-        ai_response = await ai_router.chat(current_user.id, ai_messages, db)
+        async with _chat_slot(current_user.id):
+            ai_response = await ai_router.chat(current_user.id, ai_messages, db)
     except Exception as e:
         error_text = str(e)
         lowered = error_text.lower()
@@ -190,67 +235,78 @@ async def send_message(
                 "If this keeps happening, try reducing response length (max tokens), choosing a smaller/faster model, "
                 "or increasing your reverse-proxy timeout."
             )
-            assistant_message = Message(
-                conversation_id=conversation.id,
+            message_id = _save_turn(Message(
+                conversation_id=conv_id,
                 role="assistant",
                 content=fallback_message
-            )
-            db.add(assistant_message)
-            db.commit()
-            db.refresh(assistant_message)
-            _touch_conversation(conversation)
+            ))
             return {
-                "conversation_id": conversation.id,
+                "conversation_id": conv_id,
                 "message": fallback_message,
                 "role": "assistant",
-                "message_id": assistant_message.id
+                "message_id": message_id
             }
 
         raise HTTPException(
             status_code=status.HTTP_502_BAD_GATEWAY,
             detail={
                 "message": f"AI service error: {error_text}",
-                "conversation_id": conversation.id
+                "conversation_id": conv_id
             }
         )
     
     # Save AI response
-    assistant_message = Message(
-        conversation_id=conversation.id,
+    message_id = _save_turn(Message(
+        conversation_id=conv_id,
         role="assistant",
         content=ai_response
-    )
-    db.add(assistant_message)
-    db.commit()
-    db.refresh(assistant_message)
-    _touch_conversation(conversation)
-    
+    ))
+
     return {
-        "conversation_id": conversation.id,
+        "conversation_id": conv_id,
         "message": ai_response,
         "role": "assistant",
-        "message_id": assistant_message.id
+        "message_id": message_id
     }
 
 @router.get("/conversations", response_model=List[ConversationSummary])
 async def get_conversations(
+    limit: Optional[int] = Query(None, ge=1, le=200, description="Page size; omit for the full list"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get conversation list (summaries) for current user"""
-    
-    conversations = db.query(Conversation).filter(
+    """
+    Get conversation list (summaries) for current user, most recent first.
+    With `limit`, returns one page; if more remain, the X-Next-Cursor header
+    holds the cursor for the next page (keyset on updated_at, id).
+    """
+    query = db.query(Conversation.id, Conversation.title, Conversation.updated_at).filter(
         Conversation.user_id == current_user.id
-    ).order_by(Conversation.updated_at.desc()).all()
-    
-    return [
+    )
+    if cursor:
+        query = query.filter(keyset_before(db, Conversation.updated_at, Conversation.id, cursor))
+    query = query.order_by(*keyset_order(db, Conversation.updated_at, Conversation.id))
+
+    headers = {}
+    if limit:
+        conversations = query.limit(limit + 1).all()
+        if len(conversations) > limit:
+            conversations = conversations[:limit]
+            last = conversations[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last.updated_at, last.id)
+    else:
+        conversations = query.all()
+
+    # Built from trusted rows — returned directly, skipping response_model validation
+    return ORJSONResponse([
         {
-            "id": conv.id,
-            "title": conv.title or "New Chat",
-            "updated_at": conv.updated_at.isoformat() if conv.updated_at else None
+            "id": conv_id,
+            "title": title or "New Chat",
+            "updated_at": updated_at.isoformat() if updated_at else None
         }
-        for conv in conversations
-    ]
+        for conv_id, title, updated_at in conversations
+    ], headers=headers)
 
 @router.get("/search")
 async def search_conversations(
@@ -259,10 +315,18 @@ async def search_conversations(
     db: Session = Depends(get_db)
 ):
     """Full-text search across the user's messages."""
+    # Substring match; on PostgreSQL ix_messages_content_trgm (pg_trgm) serves it
     term = f"%{q.strip()}%"
-    # Find matching messages
+    # Matching messages with their conversation's title, in one query
     matches = (
-        db.query(Message)
+        db.query(
+            Message.id,
+            Message.role,
+            func.substr(Message.content, 1, 160),   # only the snippet crosses the wire
+            Message.created_at,
+            Conversation.id,
+            Conversation.title,
+        )
         .join(Conversation, Conversation.id == Message.conversation_id)
         .filter(
             Conversation.user_id == current_user.id,
@@ -274,21 +338,16 @@ async def search_conversations(
     )
 
     results = []
-    seen_convos: set[int] = set()
-    for msg in matches:
-        conv = db.query(Conversation).filter(Conversation.id == msg.conversation_id).first()
-        if not conv:
-            continue
-        snippet = msg.content[:160].replace("\n", " ")
+    for msg_id, role, snippet, created_at, conv_id, conv_title in matches:
+        snippet = snippet.replace("\n", " ")
         results.append({
-            "conversation_id":    conv.id,
-            "conversation_title": conv.title or "New Chat",
-            "message_id":         msg.id,
-            "role":               msg.role,
+            "conversation_id":    conv_id,
+            "conversation_title": conv_title or "New Chat",
+            "message_id":         msg_id,
+            "role":               role,
             "snippet":            snippet,
-            "date":               msg.created_at.strftime("%Y-%m-%d") if msg.created_at else "",
+            "date":               created_at.strftime("%Y-%m-%d") if created_at else "",
         })
-        seen_convos.add(conv.id)
 
     return {"query": q, "count": len(results), "results": results}
 
@@ -304,16 +363,17 @@ async def bulk_delete_conversations(
     if not ids or not isinstance(ids, list):
         raise HTTPException(status_code=400, detail="ids must be a non-empty list")
     # Only delete conversations belonging to this user
-    convs = db.query(Conversation).filter(
-        Conversation.id.in_(ids),
-        Conversation.user_id == current_user.id
-    ).all()
-    deleted = []
-    for conv in convs:
-        db.query(Message).filter(Message.conversation_id == conv.id).delete()
-        db.delete(conv)
-        deleted.append(conv.id)
-    db.commit()
+    deleted = [
+        conv_id for (conv_id,) in db.query(Conversation.id).filter(
+            Conversation.id.in_(ids),
+            Conversation.user_id == current_user.id
+        )
+    ]
+    if deleted:
+        # Two set-based DELETEs, however many conversations were selected
+        db.query(Message).filter(Message.conversation_id.in_(deleted)).delete(synchronize_session=False)
+        db.query(Conversation).filter(Conversation.id.in_(deleted)).delete(synchronize_session=False)
+        db.commit()
     return {"deleted": deleted, "count": len(deleted)}
 
 
@@ -365,30 +425,28 @@ async def get_conversation(
     db: Session = Depends(get_db)
 ):
     """Load a specific conversation with all messages"""
-    
-    conversation = db.query(Conversation).filter(
+
+    # Conversation and its messages (ordered by the relationship) in one round trip
+    conversation = db.query(Conversation).options(joinedload(Conversation.messages)).filter(
         Conversation.id == conversation_id,
         Conversation.user_id == current_user.id
     ).first()
-    
+
     if not conversation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Conversation not found"
         )
-    
-    messages = db.query(Message).filter(
-        Message.conversation_id == conversation.id
-    ).order_by(Message.created_at).all()
-    
-    return {
+
+    # Can be a long history — returned directly, skipping response_model validation
+    return ORJSONResponse({
         "id": conversation.id,
         "title": conversation.title,
         "messages": [
-            {"id": msg.id, "role": msg.role, "content": msg.content}
-            for msg in messages
+            {"id": msg.id, "role": msg.role, "content": wire_content(msg.content, msg.image_url)}
+            for msg in conversation.messages
         ]
-    }
+    })
 
 @router.post("/feedback")
 async def submit_feedback(
@@ -406,7 +464,7 @@ async def submit_feedback(
     db.query(UserAnalytics).filter(
         UserAnalytics.user_id == current_user.id,
         UserAnalytics.metric_type == "message_feedback",
-        UserAnalytics.metric_value["message_id"].astext == str(message_id)
+        UserAnalytics.metric_value["message_id"].as_string() == str(message_id)
     ).delete(synchronize_session=False)
     entry = UserAnalytics(
         user_id=current_user.id,
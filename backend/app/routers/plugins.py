@@ -1,21 +1,27 @@
 # backend/app/routers/plugins.py
-from fastapi import APIRouter, Depends, HTTPException, status
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from sqlalchemy import delete, func, literal, select, true, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
-from sqlalchemy.orm.attributes import flag_modified
 from pydantic import BaseModel
 from typing import List
-from uuid import uuid4
-from app.core.database import get_db
+from secrets import token_hex
+from app.core.database import get_db, SessionLocal
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor, keyset_before, keyset_order
 from app.core.auth import get_current_user
 from app.models.user import User
 from app.models.plugin import UserPlugin, UserAnalytics
 from app.plugins.manager import plugin_manager
-from app.plugins.daily_checkin.plugin import daily_checkin_plugin
-from app.plugins.mood_tracker.plugin import mood_tracker_plugin
+from app.routers.analytics import invalidate_insights
+from app.services.ai.router import AIRouter, ai_router
+from app.plugins.daily_checkin.plugin import daily_checkin_plugin, Mood, MOOD_LABELS
+from app.plugins.mood_tracker.plugin import mood_tracker_plugin, MOOD_EMOJI
 from app.plugins.recharge.plugin import recharge_plugin
 from datetime import datetime, timezone, date, timedelta
 
-router = APIRouter()
+router = APIRouter(prefix="/plugins", tags=["Plugins"], default_response_class=ORJSONResponse)
 
 
 # ── Request / Response models ────────────────────────────────────────────────
@@ -32,7 +38,7 @@ class PluginToggleRequest(BaseModel):
 
 
 class CheckinRequest(BaseModel):
-    mood: str        # 'great' | 'good' | 'okay' | 'tired' | 'struggling'
+    mood: Mood
     note: str | None = None
     checkin_date: str | None = None  # YYYY-MM-DD (optional backfill date)
 
@@ -48,7 +54,7 @@ class CheckinStatusResponse(BaseModel):
 
 
 class CheckinUpdateRequest(BaseModel):
-    mood: str
+    mood: Mood
     note: str | None = None
     checkin_date: str | None = None  # YYYY-MM-DD optional when moving an entry
 
@@ -127,8 +133,10 @@ class TaskBreakdownRequest(BaseModel):
     task: str
 
 
-VALID_RECHARGE_TYPES = {"article", "video", "audio"}
-VALID_TASK_BOARD_COLUMNS = {"backlog", "pending", "inprogress", "completed"}
+CHECKIN_STREAM_DAYS = 90   # unpaged /checkin/history over a longer range is streamed
+VALID_RECHARGE_TYPES = frozenset({"article", "video", "audio"})
+VALID_TASK_BOARD_COLUMNS = frozenset({"backlog", "pending", "inprogress", "completed"})
+_URL_SCHEMES = ("http://", "https://")
 
 
 def _normalize_task_board_column(column: str | None, fallback: str = "pending") -> str:
@@ -145,42 +153,45 @@ def _normalize_task_board_column(column: str | None, fallback: str = "pending")
     return mapped if mapped in VALID_TASK_BOARD_COLUMNS else fallback
 
 
-def _kanban_row(user_id: int, db: Session) -> UserPlugin:
-    row = db.query(UserPlugin).filter(
-        UserPlugin.user_id == user_id,
-        UserPlugin.plugin_name == "kanban_board"
-    ).first()
+# Dialect inserts with ON CONFLICT support (PostgreSQL, SQLite for local runs)
+_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def _plugin_row(user_id: int, plugin_name: str, db: Session) -> UserPlugin:
+    """The user's settings row for a plugin, created (uncommitted) if missing."""
+    # (user_id, plugin_name) is unique — a single index lookup
+    query = db.query(UserPlugin).filter_by(user_id=user_id, plugin_name=plugin_name)
+    row = query.one_or_none()
     if not row:
-        row = UserPlugin(user_id=user_id, plugin_name="kanban_board", enabled=True, settings={})
-        db.add(row)
-        db.commit()
-        db.refresh(row)
+        # Two first requests can race here; the unique index lets the loser's insert
+        # be a no-op instead of an IntegrityError, and both then read the one row.
+        # Committed by the first save; until then a missing row reads the same.
+        insert = _INSERTS[db.get_bind().dialect.name]
+        db.execute(
+            insert(UserPlugin)
+            .values(user_id=user_id, plugin_name=plugin_name, enabled=True, settings={})
+            .on_conflict_do_nothing(index_elements=[UserPlugin.user_id, UserPlugin.plugin_name])
+        )
+        row = query.one()
     return row
 
 
+def _kanban_row(user_id: int, db: Session) -> UserPlugin:
+    return _plugin_row(user_id, "kanban_board", db)
+
+
 def _kanban_settings(row: UserPlugin) -> dict:
     return row.settings if isinstance(row.settings, dict) else {}
 
 
 def _kanban_save(row: UserPlugin, settings: dict, db: Session):
     row.settings = settings
-    flag_modified(row, "settings")
     db.add(row)
     db.commit()
-    db.refresh(row)
 
 
 def _task_row(user_id: int, db: Session) -> UserPlugin:
-    row = db.query(UserPlugin).filter(
-        UserPlugin.user_id == user_id,
-        UserPlugin.plugin_name == "task_breakdown"
-    ).first()
-    if not row:
-        row = UserPlugin(user_id=user_id, plugin_name="task_breakdown", enabled=True, settings={})
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-    return row
+    return _plugin_row(user_id, "task_breakdown", db)
 
 
 def _task_settings(row: UserPlugin) -> dict:
@@ -189,23 +200,12 @@ def _task_settings(row: UserPlugin) -> dict:
 
 def _task_save(row: UserPlugin, settings: dict, db: Session):
     row.settings = settings
-    flag_modified(row, "settings")
     db.add(row)
     db.commit()
-    db.refresh(row)
 
 
 def _recharge_row(user_id: int, db: Session) -> UserPlugin:
-    row = db.query(UserPlugin).filter(
-        UserPlugin.user_id == user_id,
-        UserPlugin.plugin_name == "recharge"
-    ).first()
-    if not row:
-        row = UserPlugin(user_id=user_id, plugin_name="recharge", enabled=True, settings={})
-        db.add(row)
-        db.commit()
-        db.refresh(row)
-    return row
+    return _plugin_row(user_id, "recharge", db)
 
 
 def _custom_items(row: UserPlugin) -> list[dict]:
@@ -218,10 +218,8 @@ def _save_custom_items(row: UserPlugin, items: list[dict], db: Session):
     settings = row.settings if isinstance(row.settings, dict) else {}
     settings["custom_items"] = items
     row.settings = settings
-    flag_modified(row, "settings")
     db.add(row)
     db.commit()
-    db.refresh(row)
 
 
 def _validate_recharge_payload(data: RechargeItemInput) -> dict:
@@ -238,7 +236,7 @@ def _validate_recharge_payload(data: RechargeItemInput) -> dict:
         raise HTTPException(status_code=400, detail="title is required")
     if not url:
         raise HTTPException(status_code=400, detail="url is required")
-    if not (url.startswith("http://") or url.startswith("https://")):
+    if not url.startswith(_URL_SCHEMES):
         raise HTTPException(status_code=400, detail="url must start with http:// or https://")
 
     return {
@@ -265,43 +263,109 @@ def _parse_checkin_date(checkin_date_str: str | None) -> date:
     return target_date
 
 
-def _checkin_for_date(user_id: int, target_date: date, db: Session) -> UserAnalytics | None:
+def _checkin_date_filter(user_id: int, target_date: date) -> tuple:
     start = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=timezone.utc)
     end = start + timedelta(days=1)
+    return (
+        UserAnalytics.user_id == user_id,
+        UserAnalytics.metric_type == "checkin",
+        UserAnalytics.recorded_at >= start,
+        UserAnalytics.recorded_at < end,
+    )
+
+
+def _checkin_for_date(user_id: int, target_date: date, db: Session) -> UserAnalytics | None:
     return (
         db.query(UserAnalytics)
-        .filter(
-            UserAnalytics.user_id == user_id,
-            UserAnalytics.metric_type == "checkin",
-            UserAnalytics.recorded_at >= start,
-            UserAnalytics.recorded_at < end,
-        )
+        .filter(*_checkin_date_filter(user_id, target_date))
         .order_by(UserAnalytics.recorded_at.desc())
         .first()
     )
 
 
+def _checkin_entries(rows):
+    """History entries for (id, mood, note, checkin_date, recorded_at) rows."""
+    label_of, emoji_of = MOOD_LABELS.get, MOOD_EMOJI.get   # bound once for the loop
+    for entry_id, mood, note, checkin_date, recorded_at in rows:
+        yield {
+            "id": entry_id,
+            "mood": mood,
+            "label": label_of(mood, mood),
+            "emoji": emoji_of(mood, ""),
+            "note": note or "",
+            "date": checkin_date or recorded_at.date().isoformat(),
+            "recorded_at": recorded_at.isoformat(),
+        }
+
+
+def _checkin_history_stream(query):
+    """
+    Yield {"entries": [...]} one entry at a time, fetching rows in yield_per batches.
+    Uses its own session: the request's session is closed before streaming starts.
+    """
+    dumps = orjson.dumps
+    db = SessionLocal()
+    try:
+        yield b'{"entries":['
+        sep = b""
+        for entry in _checkin_entries(db.execute(query.execution_options(yield_per=100))):
+            yield sep + dumps(entry)
+            sep = b","
+        yield b"]}"
+    finally:
+        db.close()
+
+
+def _checkin_upsert_state(user_id: int, target_date: date, db: Session):
+    """
+    One round trip for submit_checkin: whether the plugin is enabled, plus the
+    (id, recorded_at) of the check-in already saved for target_date (both None if none).
+    """
+    enabled = (
+        select(UserPlugin.enabled)
+        .where(UserPlugin.user_id == user_id, UserPlugin.plugin_name == "daily_checkin")
+        .limit(1)
+        .scalar_subquery()
+    )
+    existing = (
+        select(UserAnalytics.id, UserAnalytics.recorded_at)
+        .where(*_checkin_date_filter(user_id, target_date))
+        .order_by(UserAnalytics.recorded_at.desc())
+        .limit(1)
+        .subquery()
+    )
+    # Outer join against a one-row anchor so the enabled flag comes back even with no check-in
+    anchor = select(literal(1).label("one")).subquery()
+    enabled_flag, entry_id, recorded_at = db.execute(
+        select(enabled, existing.c.id, existing.c.recorded_at)
+        .select_from(anchor.outerjoin(existing, true()))
+    ).one()
+    return enabled_flag is not False, entry_id, recorded_at   # no plugin row means enabled
+
+
 # ── Endpoints ────────────────────────────────────────────────────────────────
 
 @router.get("", response_model=List[PluginInfo])
-async def list_plugins(
+def list_plugins(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """List all plugins with their enabled status for the current user."""
-    return [
+    enabled = plugin_manager.enabled_map(current_user.id, db)
+    # Built from the registry — returned directly, skipping response_model validation
+    return ORJSONResponse([
         {
             "name": p.name,
             "display_name": p.display_name,
             "description": p.description,
-            "enabled": plugin_manager.is_enabled(p.name, current_user.id, db),
+            "enabled": enabled.get(p.name, True),
         }
         for p in plugin_manager.all_plugins()
-    ]
+    ])
 
 
 @router.post("/{plugin_name}/toggle")
-async def toggle_plugin(
+def toggle_plugin(
     plugin_name: str,
     data: PluginToggleRequest | None = None,
     current_user: User = Depends(get_current_user),
@@ -312,9 +376,8 @@ async def toggle_plugin(
     if not plugin:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Plugin not found")
 
-    currently_enabled = plugin_manager.is_enabled(plugin_name, current_user.id, db)
-    new_state = data.enabled if (data is not None and data.enabled is not None) else (not currently_enabled)
-    plugin_manager.set_enabled(plugin_name, current_user.id, new_state, db)
+    requested = data.enabled if data is not None else None
+    new_state = plugin_manager.set_enabled(plugin_name, current_user.id, requested, db)
 
     return {"plugin": plugin_name, "enabled": new_state}
 
@@ -322,7 +385,7 @@ async def toggle_plugin(
 # ── Daily Check-in endpoints ─────────────────────────────────────────────────
 
 @router.get("/checkin/status", response_model=CheckinStatusResponse)
-async def checkin_status(
+def checkin_status(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -330,8 +393,6 @@ async def checkin_status(
     if not plugin_manager.is_enabled("daily_checkin", current_user.id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Enable plugin please: Daily Check-in")
 
-    from app.plugins.daily_checkin.plugin import MOOD_LABELS
-    from datetime import date, timezone, datetime
 
     entry = daily_checkin_plugin._todays_checkin(current_user.id, db)
     if entry:
@@ -346,19 +407,20 @@ async def checkin_status(
 
     # Not checked in today — find most recent past entry for the reminder
     today_start = datetime.combine(date.today(), datetime.min.time()).replace(tzinfo=timezone.utc)
-    last_entry = (
-        db.query(UserAnalytics)
-        .filter(
+    # Only the timestamp is needed — the newest one straight off the index
+    last_recorded_at = db.execute(
+        select(UserAnalytics.recorded_at)
+        .where(
             UserAnalytics.user_id == current_user.id,
             UserAnalytics.metric_type == "checkin",
             UserAnalytics.recorded_at < today_start,
         )
         .order_by(UserAnalytics.recorded_at.desc())
-        .first()
-    )
+        .limit(1)
+    ).scalar()
 
-    if last_entry:
-        last_date  = last_entry.recorded_at.date()
+    if last_recorded_at:
+        last_date  = last_recorded_at.date()
         days_since = (date.today() - last_date).days
         return {
             "checked_in_today": False,
@@ -370,113 +432,100 @@ async def checkin_status(
 
 
 @router.post("/checkin")
-async def submit_checkin(
+def submit_checkin(
     data: CheckinRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Submit or update a daily check-in for today or a past date (upsert per date)."""
-    if not plugin_manager.is_enabled("daily_checkin", current_user.id, db):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Daily check-in plugin is disabled")
-
-    MOOD_LABELS_LOCAL = {
-        "great": "😊 Great", "good": "🙂 Good", "okay": "😐 Okay",
-        "tired": "😴 Tired", "struggling": "😔 Struggling",
-    }
-    MOOD_EMOJI_LOCAL = {
-        "great": "😊", "good": "🙂", "okay": "😐", "tired": "😴", "struggling": "😔",
-    }
-    if data.mood not in MOOD_LABELS_LOCAL:
-        raise HTTPException(status_code=400, detail=f"Invalid mood '{data.mood}'.")
-
     target_date = _parse_checkin_date(data.checkin_date)
+    enabled, entry_id, recorded_at = _checkin_upsert_state(current_user.id, target_date, db)
+    if not enabled:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Daily check-in plugin is disabled")
 
-    # Upsert: update check-in for target date if it already exists
-    existing = _checkin_for_date(current_user.id, target_date, db)
-    if existing:
-        existing.metric_value = {"mood": data.mood, "note": data.note or "", "checkin_date": target_date.isoformat()}
-        flag_modified(existing, "metric_value")
-        db.commit()
-        db.refresh(existing)
-        return {
-            "id": existing.id,
-            "mood": data.mood,
-            "label": MOOD_LABELS_LOCAL[data.mood],
-            "emoji": MOOD_EMOJI_LOCAL.get(data.mood, ""),
-            "note": data.note or "",
-            "date": target_date.isoformat(),
-            "recorded_at": existing.recorded_at.isoformat(),
-        }
-
-    entry_time = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=timezone.utc) + timedelta(hours=12)
-    entry = UserAnalytics(
-        user_id=current_user.id,
-        metric_type="checkin",
-        metric_value={"mood": data.mood, "note": data.note or "", "checkin_date": target_date.isoformat()},
-        recorded_at=entry_time,
-    )
-    db.add(entry)
+    metric_value = {"mood": data.mood, "note": data.note or "", "checkin_date": target_date.isoformat()}
+    if entry_id is not None:
+        # Upsert: update check-in for target date if it already exists
+        db.execute(update(UserAnalytics).where(UserAnalytics.id == entry_id).values(metric_value=metric_value))
+    else:
+        recorded_at = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=timezone.utc) + timedelta(hours=12)
+        entry = UserAnalytics(
+            user_id=current_user.id,
+            metric_type="checkin",
+            metric_value=metric_value,
+            recorded_at=recorded_at,
+        )
+        db.add(entry)
+        db.flush()
+        entry_id = entry.id
     db.commit()
-    db.refresh(entry)
+    invalidate_insights(current_user.id)
 
     return {
-        "id": entry.id,
+        "id": entry_id,
         "mood": data.mood,
-        "label": MOOD_LABELS_LOCAL[data.mood],
-        "emoji": MOOD_EMOJI_LOCAL.get(data.mood, ""),
+        "label": MOOD_LABELS[data.mood],
+        "emoji": MOOD_EMOJI.get(data.mood, ""),
         "note": data.note or "",
         "date": target_date.isoformat(),
-        "recorded_at": entry.recorded_at.isoformat(),
+        "recorded_at": recorded_at.isoformat(),
     }
 
 
 @router.get("/checkin/history")
-async def checkin_history(
+def checkin_history(
     days: int = 365,
+    limit: int | None = Query(None, ge=1, le=365, description="Page size; omit for every entry in range"),
+    cursor: str | None = Query(None, description="X-Next-Cursor header from the previous page"),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Return all check-ins for the current user, newest first."""
+    """
+    Return all check-ins for the current user, newest first.
+    With `limit`, returns one page; if more remain, the X-Next-Cursor header
+    holds the cursor for the next page (keyset on recorded_at, id).
+    """
     if not plugin_manager.is_enabled("daily_checkin", current_user.id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Enable plugin please: Daily Check-in")
 
-    from datetime import date, datetime, timedelta, timezone
-    from app.models.plugin import UserAnalytics
-    MOOD_LABELS_LOCAL = {
-        "great": "😊 Great", "good": "🙂 Good", "okay": "😐 Okay",
-        "tired": "😴 Tired", "struggling": "😔 Struggling",
-    }
-    MOOD_EMOJI_LOCAL = {
-        "great": "😊", "good": "🙂", "okay": "😐", "tired": "😴", "struggling": "😔",
-    }
     since = datetime.combine(
         date.today() - timedelta(days=max(days, 1)),
         datetime.min.time()
     ).replace(tzinfo=timezone.utc)
-    entries = (
-        db.query(UserAnalytics)
-        .filter(
+    # Only the fields the response needs, pulled out of the JSON server-side
+    query = (
+        select(
+            UserAnalytics.id,
+            func.coalesce(UserAnalytics.metric_value["mood"].as_string(), "okay"),
+            UserAnalytics.metric_value["note"].as_string(),
+            UserAnalytics.metric_value["checkin_date"].as_string(),
+            UserAnalytics.recorded_at,
+        )
+        .where(
             UserAnalytics.user_id == current_user.id,
             UserAnalytics.metric_type == "checkin",
             UserAnalytics.recorded_at >= since,
         )
-        .order_by(UserAnalytics.recorded_at.desc())
-        .all()
+        .order_by(*keyset_order(db, UserAnalytics.recorded_at, UserAnalytics.id))
     )
-    result = []
-    for e in entries:
-        mood = e.metric_value.get("mood", "okay")
-        checkin_date = e.metric_value.get("checkin_date") if isinstance(e.metric_value, dict) else None
-        result.append({
-            "id": e.id,
-            "mood": mood,
-            "label": MOOD_LABELS_LOCAL.get(mood, mood),
-            "emoji": MOOD_EMOJI_LOCAL.get(mood, ""),
-            "note": e.metric_value.get("note", ""),
-            "date": checkin_date or e.recorded_at.strftime("%Y-%m-%d"),
-            "recorded_at": e.recorded_at.isoformat(),
-        })
-    return {"entries": result}
+    if cursor:
+        query = query.where(keyset_before(db, UserAnalytics.recorded_at, UserAnalytics.id, cursor))
+
+    headers = {}
+    if limit:
+        rows = db.execute(query.limit(limit + 1)).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            headers[NEXT_CURSOR_HEADER] = encode_cursor(last.recorded_at, last.id)
+    elif days > CHECKIN_STREAM_DAYS:
+        # Long ranges stream row by row; same document shape as the buffered response
+        return StreamingResponse(_checkin_history_stream(query), media_type="application/json")
+    else:
+        rows = db.execute(query).all()
+
+    # Already plain JSON types: skip FastAPI's per-field encoding
+    return ORJSONResponse({"entries": list(_checkin_entries(rows))}, headers=headers)
 
 
 @router.post("/checkin/ai-suggest")
@@ -489,18 +538,12 @@ async def checkin_ai_suggest(
     if not plugin_manager.is_enabled("daily_checkin", current_user.id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Enable plugin please: Daily Check-in")
 
-    from app.services.ai.router import AIRouter
-    MOOD_LABELS_LOCAL = {
-        "great": "great", "good": "good", "okay": "okay",
-        "tired": "tired", "struggling": "struggling",
-    }
     router_ai = AIRouter()
     settings = await router_ai.get_user_settings(current_user.id, db)
     if not settings.get("api_endpoint"):
         raise HTTPException(status_code=400, detail="LLM not configured. Save your settings first.")
 
-    mood_desc = MOOD_LABELS_LOCAL.get(data.mood, data.mood)
-    prompt = f"The user is doing their daily wellness check-in and is feeling '{mood_desc}' today."
+    prompt = f"The user is doing their daily wellness check-in and is feeling '{data.mood}' today."
     if data.context:
         prompt += f" They mentioned: {data.context}."
     prompt += " Please write a short, warm, empathetic 1-2 sentence journal note in first person that they could save as their check-in note. Be concise and supportive. Reply with only the note text, no quotes or preamble."
@@ -516,7 +559,7 @@ async def checkin_ai_suggest(
 
 
 @router.patch("/checkin/{entry_id}")
-async def update_checkin(
+def update_checkin(
     entry_id: int,
     data: CheckinUpdateRequest,
     current_user: User = Depends(get_current_user),
@@ -526,14 +569,6 @@ async def update_checkin(
     if not plugin_manager.is_enabled("daily_checkin", current_user.id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Enable plugin please: Daily Check-in")
 
-    from app.models.plugin import UserAnalytics
-    MOOD_LABELS_LOCAL = {
-        "great": "😊 Great", "good": "🙂 Good", "okay": "😐 Okay",
-        "tired": "😴 Tired", "struggling": "😔 Struggling",
-    }
-    MOOD_EMOJI_LOCAL = {
-        "great": "😊", "good": "🙂", "okay": "😐", "tired": "😴", "struggling": "😔",
-    }
     entry = db.query(UserAnalytics).filter(
         UserAnalytics.id == entry_id,
         UserAnalytics.user_id == current_user.id,
@@ -541,46 +576,45 @@ async def update_checkin(
     ).first()
     if not entry:
         raise HTTPException(status_code=404, detail="Check-in not found.")
-    if data.mood not in MOOD_LABELS_LOCAL:
-        raise HTTPException(status_code=400, detail=f"Invalid mood '{data.mood}'.")
     target_date = _parse_checkin_date(data.checkin_date) if data.checkin_date else None
     if target_date:
         existing_for_target = _checkin_for_date(current_user.id, target_date, db)
         if existing_for_target and existing_for_target.id != entry.id:
             existing_for_target.metric_value = {"mood": data.mood, "note": data.note or "", "checkin_date": target_date.isoformat()}
-            flag_modified(existing_for_target, "metric_value")
+            # Read before commit — committing expires the instance
+            target_id, recorded_at = existing_for_target.id, existing_for_target.recorded_at
             db.delete(entry)
             db.commit()
-            db.refresh(existing_for_target)
+            invalidate_insights(current_user.id)
             return {
-                "id": existing_for_target.id,
+                "id": target_id,
                 "mood": data.mood,
-                "label": MOOD_LABELS_LOCAL[data.mood],
-                "emoji": MOOD_EMOJI_LOCAL.get(data.mood, ""),
+                "label": MOOD_LABELS[data.mood],
+                "emoji": MOOD_EMOJI.get(data.mood, ""),
                 "note": data.note or "",
                 "date": target_date.isoformat(),
-                "recorded_at": existing_for_target.recorded_at.isoformat(),
+                "recorded_at": recorded_at.isoformat(),
             }
 
         entry.recorded_at = datetime.combine(target_date, datetime.min.time()).replace(tzinfo=timezone.utc) + timedelta(hours=12)
 
     entry.metric_value = {"mood": data.mood, "note": data.note or "", **({"checkin_date": target_date.isoformat()} if target_date else {})}
-    flag_modified(entry, "metric_value")
+    recorded_at = entry.recorded_at
     db.commit()
-    db.refresh(entry)
+    invalidate_insights(current_user.id)
     return {
-        "id": entry.id,
+        "id": entry_id,
         "mood": data.mood,
-        "label": MOOD_LABELS_LOCAL[data.mood],
-        "emoji": MOOD_EMOJI_LOCAL.get(data.mood, ""),
+        "label": MOOD_LABELS[data.mood],
+        "emoji": MOOD_EMOJI.get(data.mood, ""),
         "note": data.note or "",
-        "date": (target_date.isoformat() if target_date else entry.recorded_at.strftime("%Y-%m-%d")),
-        "recorded_at": entry.recorded_at.isoformat(),
+        "date": (target_date.isoformat() if target_date else recorded_at.strftime("%Y-%m-%d")),
+        "recorded_at": recorded_at.isoformat(),
     }
 
 
 @router.delete("/checkin/{entry_id}")
-async def delete_checkin(
+def delete_checkin(
     entry_id: int,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -589,23 +623,24 @@ async def delete_checkin(
     if not plugin_manager.is_enabled("daily_checkin", current_user.id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Enable plugin please: Daily Check-in")
 
-    from app.models.plugin import UserAnalytics
-    entry = db.query(UserAnalytics).filter(
+    # One DELETE; the ownership check is part of the WHERE clause
+    result = db.execute(delete(UserAnalytics).where(
         UserAnalytics.id == entry_id,
         UserAnalytics.user_id == current_user.id,
         UserAnalytics.metric_type == "checkin",
-    ).first()
-    if not entry:
+    ))
+    if not result.rowcount:
+        db.rollback()
         raise HTTPException(status_code=404, detail="Check-in not found.")
-    db.delete(entry)
     db.commit()
+    invalidate_insights(current_user.id)
     return {"message": "Deleted."}
 
 
 # ── Mood history endpoints ────────────────────────────────────────────────────
 
 @router.get("/mood/history", response_model=MoodHistoryResponse)
-async def mood_history(
+def mood_history(
     days: int = 30,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -617,7 +652,8 @@ async def mood_history(
     entries = mood_tracker_plugin.get_history(current_user.id, db, days=min(days, 365))
     summary = mood_tracker_plugin.mood_summary(current_user.id, db)
 
-    return {"entries": entries, "summary": summary}
+    # Built from trusted rows — returned directly, skipping response_model validation
+    return ORJSONResponse({"entries": entries, "summary": summary})
 
 
 @router.get("/recharge/quote")
@@ -626,38 +662,40 @@ async def recharge_quote(
     db: Session = Depends(get_db)
 ):
     """Get a fresh motivational quote."""
-    from datetime import datetime, timezone
 
     if not plugin_manager.is_enabled("recharge", current_user.id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Recharge plugin is disabled")
 
-    quote = await recharge_plugin.quote()
+    quote = await recharge_plugin.quote(fresh=True)
     return {"quote": quote, "updated_at": datetime.now(timezone.utc).isoformat()}
 
 
+# The curated lists never change at runtime: serialize them once, leaving the object open
+_FEED_LISTS_BODY = orjson.dumps({
+    "articles": [dict(item) for item in recharge_plugin.articles()],
+    "videos": [dict(item) for item in recharge_plugin.videos()],
+    "audio": [dict(item) for item in recharge_plugin.audio()],
+})[:-1]
+
+
 @router.get("/recharge/feed", response_model=RechargeFeedResponse)
 async def recharge_feed(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Get curated motivation/recharge content feed."""
-    from datetime import datetime, timezone
 
     if not plugin_manager.is_enabled("recharge", current_user.id, db):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Recharge plugin is disabled")
 
     quote = await recharge_plugin.quote()
-    return {
-        "articles": recharge_plugin.articles(),
-        "videos": recharge_plugin.videos(),
-        "audio": recharge_plugin.audio(),
-        "quote": quote,
-        "updated_at": datetime.now(timezone.utc).isoformat(),
-    }
+    # Only the quote and timestamp are encoded per request
+    tail = orjson.dumps({"quote": quote, "updated_at": datetime.now(timezone.utc).isoformat()})
+    return Response(_FEED_LISTS_BODY + b"," + tail[1:], media_type="application/json")
 
 
 @router.get("/recharge/custom-items", response_model=RechargeCustomItemsResponse)
-async def recharge_custom_items(
+def recharge_custom_items(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -670,7 +708,7 @@ async def recharge_custom_items(
 
 
 @router.post("/recharge/custom-items", response_model=RechargeItemResponse)
-async def recharge_add_custom_item(
+def recharge_add_custom_item(
     data: RechargeItemInput,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -684,7 +722,7 @@ async def recharge_add_custom_item(
     items = _custom_items(row)
 
     item = {
-        "id": uuid4().hex[:12],
+        "id": token_hex(6),
         **clean,
     }
     items.insert(0, item)
@@ -693,7 +731,7 @@ async def recharge_add_custom_item(
 
 
 @router.patch("/recharge/custom-items/{item_id}", response_model=RechargeItemResponse)
-async def recharge_edit_custom_item(
+def recharge_edit_custom_item(
     item_id: str,
     data: RechargeItemInput,
     current_user: User = Depends(get_current_user),
@@ -718,7 +756,7 @@ async def recharge_edit_custom_item(
 
 
 @router.delete("/recharge/custom-items/{item_id}")
-async def recharge_delete_custom_item(
+def recharge_delete_custom_item(
     item_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -749,7 +787,6 @@ async def urgent_session_chat(
     if not data.message or not data.message.strip():
         raise HTTPException(status_code=400, detail="message is required")
 
-    from app.services.ai.router import ai_router
 
     history_msgs = [
         {"role": m.role, "content": m.content}
@@ -771,7 +808,7 @@ async def urgent_session_chat(
 
 @router.get("/task-board/cards")
 @router.get("/kanban/cards")
-async def kanban_list_cards(
+def kanban_list_cards(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -798,7 +835,7 @@ async def kanban_list_cards(
 
 @router.post("/task-board/cards")
 @router.post("/kanban/cards")
-async def kanban_add_card(
+def kanban_add_card(
     data: KanbanCardCreateRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -817,7 +854,7 @@ async def kanban_add_card(
     cards = settings.get("cards", []) if isinstance(settings.get("cards", []), list) else []
     now_iso = datetime.now(timezone.utc).isoformat()
     card = {
-        "id": uuid4().hex[:12],
+        "id": token_hex(6),
         "title": title[:160],
         "note": (data.note or "")[:1000],
         "column": column,
@@ -832,7 +869,7 @@ async def kanban_add_card(
 
 @router.patch("/task-board/cards/{card_id}")
 @router.patch("/kanban/cards/{card_id}")
-async def kanban_update_card(
+def kanban_update_card(
     card_id: str,
     data: KanbanCardUpdateRequest,
     current_user: User = Depends(get_current_user),
@@ -869,7 +906,7 @@ async def kanban_update_card(
 
 @router.delete("/task-board/cards/{card_id}")
 @router.delete("/kanban/cards/{card_id}")
-async def kanban_delete_card(
+def kanban_delete_card(
     card_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -901,7 +938,6 @@ async def task_breakdown_plan(
     if not task:
         raise HTTPException(status_code=400, detail="task is required")
 
-    from app.services.ai.router import ai_router
     prompt = (
         "Break this task into 5-8 tiny steps. For each step include: short title, 1 action sentence, and timer minutes. "
         "Keep tone gentle and practical. Return plain text only.\\n\\nTask: " + task
@@ -924,7 +960,7 @@ async def task_breakdown_plan(
     settings = _task_settings(row)
     history = settings.get("history", []) if isinstance(settings.get("history", []), list) else []
     entry = {
-        "id": uuid4().hex[:12],
+        "id": token_hex(6),
         "task": task[:300],
         "plan": plan_text,
         "created_at": datetime.now(timezone.utc).isoformat(),
@@ -936,7 +972,7 @@ async def task_breakdown_plan(
 
 
 @router.get("/task-breakdown/history")
-async def task_breakdown_history(
+def task_breakdown_history(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -950,7 +986,7 @@ async def task_breakdown_history(
 
 
 @router.delete("/task-breakdown/history/{entry_id}")
-async def task_breakdown_delete_history(
+def task_breakdown_delete_history(
     entry_id: str,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -18,6 +18,7 @@ from typing import Optional
 
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
@@ -27,9 +28,10 @@ from app.models.user import User
 from app.models.conversation import Conversation, Message
 from app.services.ai.router import ai_router         # shared LLM caller
 from app.plugins.manager import plugin_manager
+from app.plugins.daily_checkin.plugin import daily_checkin_plugin
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(prefix="/chat/suggestions", tags=["Suggestions"], default_response_class=ORJSONResponse)
 
 # ── Cooldown cache ────────────────────────────────────────────────────────────
 # { user_id: {"last_at": datetime, "cached": list[dict]} }
@@ -190,16 +192,8 @@ async def get_suggestions(
 
 def _check_if_checked_in_today(user_id: int, db: Session) -> bool:
     """Returns True if the user already has a check-in entry for today."""
-    from app.models.plugin import UserAnalytics
-    from datetime import date
-    today_str = str(date.today())
-    row = db.query(UserAnalytics).filter(
-        UserAnalytics.user_id == user_id,
-        UserAnalytics.plugin_name == "daily_checkin",
-        UserAnalytics.event_type == "checkin",
-        UserAnalytics.event_data.contains(today_str),
-    ).first()
-    return row is not None
+    # Shares the session-cached lookup already done by collect_ai_context
+    return daily_checkin_plugin.has_checked_in_today(user_id, db)
 
 
 VALID_ACTIONS = {"message", "checkin", "resources", "breathing"}
@@ -1,7 +1,7 @@
 # backend/app/routers/voice.py
 import io
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Literal
@@ -10,7 +10,7 @@ from app.core.auth import get_current_user
 from app.models.user import User
 from app.models.settings import UserAISettings
 
-router = APIRouter()
+router = APIRouter(prefix="/voice", tags=["Voice"], default_response_class=ORJSONResponse)
 
 TTS_VOICES = ["alloy", "echo", "fable", "onyx", "nova", "shimmer"]
 
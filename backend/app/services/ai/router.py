@@ -1,10 +1,24 @@
 # backend/app/services/ai/router.py
+import time
 from typing import List, Dict, Any
 from sqlalchemy.orm import Session
 from app.services.ai.base import AIProvider
 from app.services.ai.generic import GenericLLMProvider
 from app.models.settings import UserAISettings
 
+# The LLM settings row is global and changes rarely; chat turns read it twice.
+# (fetched_at, settings) — dropped by the admin settings endpoint on save,
+# other workers pick up changes within the TTL.
+_settings_cache: tuple[float, Dict[str, Any]] | None = None
+SETTINGS_TTL_SECONDS = 30
+
+
+def invalidate_settings() -> None:
+    """Forget the cached LLM settings after they are saved."""
+    global _settings_cache
+    _settings_cache = None
+
+
 class AIRouter:
     """Routes AI requests to generic provider with user configuration"""
     
@@ -14,7 +28,15 @@ class AIRouter:
     
     async def get_user_settings(self, user_id: int, db: Session) -> Dict[str, Any]:
         """Get global LLM configuration (shared across all users)"""
+        global _settings_cache
+        if _settings_cache and time.monotonic() - _settings_cache[0] < SETTINGS_TTL_SECONDS:
+            return dict(_settings_cache[1])
+        settings = self._load_settings(db)
+        _settings_cache = (time.monotonic(), settings)
+        return dict(settings)
 
+    @staticmethod
+    def _load_settings(db: Session) -> Dict[str, Any]:
         settings = db.query(UserAISettings).first()
         
         if not settings: